@@ -78,6 +78,29 @@ WSGI_APPLICATION = 'artistalley.wsgi.application'
 # Database configuration is imported from config.py
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+# Every gunicorn worker must see the same cache, or invalidations, sessions and
+# counters only reach the worker that made them. Redis when REDIS_URL is set,
+# otherwise a database table (created by `manage.py createcachetable`).
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'django_cache',
+            'OPTIONS': {'MAX_ENTRIES': 50000},
+        }
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -133,6 +156,24 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
 }
 
+# Artwork view/like increments are buffered per worker and written with F() updates
+ARTWORK_COUNTERS = {
+    'FLUSH_INTERVAL': float(os.getenv('ARTWORK_COUNTER_FLUSH_INTERVAL', '5')),
+    # Increments a worker holds before flushing early; bounds what a crashed worker loses
+    'MAX_PENDING': int(os.getenv('ARTWORK_COUNTER_MAX_PENDING', '100')),
+}
+
+ARTWORK_PRICING = {
+    # Seconds between each worker's check for promotions that started or ended
+    'REFRESH_INTERVAL': float(os.getenv('ARTWORK_PRICE_REFRESH_INTERVAL', '60')),
+}
+
+# Recommendation engine settings (defaults live in recommendations/conf.py)
+RECOMMENDATIONS = {
+    'BUFFERED_TRACKING': os.getenv('RECOMMENDATIONS_BUFFERED_TRACKING', 'False').lower() == 'true',
+    'CACHE_USE_DATABASE': os.getenv('RECOMMENDATIONS_CACHE_USE_DATABASE', 'False').lower() == 'true',
+}
+
 # Authentication
 AUTH_USER_MODEL = 'users.CustomUser'
 
@@ -2,4 +2,8 @@ from django.apps import AppConfig
 
 class ArtworksConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'artworks'
\ No newline at end of file
+    name = 'artworks'
+
+    def ready(self):
+        # Keep effective prices in step with artwork and promotion changes
+        import artworks.signals  # noqa
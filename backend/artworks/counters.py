@@ -0,0 +1,205 @@
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.dispatch import Signal
+
+from .models import Artwork
+
+logger = logging.getLogger(__name__)
+
+COUNTER_FIELDS = ('views', 'likes')
+
+# Sent after a flush with counts={artwork_id: {'views': ..., 'likes': ...}}
+# holding the persisted totals of every artwork that was written
+counters_flushed = Signal()
+
+
+class ArtworkCounterBuffer:
+    """Per-worker buffer of artwork view and like increments
+
+    Increments are summed in memory and written by a daemon thread every
+    flush_interval seconds as F() updates, one UPDATE per distinct pair of
+    deltas, so concurrent workers never overwrite each other's counts. Once
+    max_pending increments are waiting the thread is woken to flush early,
+    which bounds what a worker that dies without running its atexit hook
+    can lose. Reads add the deltas this worker has not written yet.
+    """
+
+    def __init__(self, flush_interval: float = 5.0, max_pending: int = 100):
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+
+        self._pending = defaultdict(lambda: dict.fromkeys(COUNTER_FIELDS, 0))
+        self._in_flight = {}
+        self._pending_count = 0
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._stopping = False
+
+        self.added_count = 0
+        self.flushed_count = 0
+        self.flush_count = 0
+        self.failed_flush_count = 0
+        self.last_flush_seconds = 0.0
+
+    def add(self, artwork_id: int, field: str, amount: int = 1) -> int:
+        """Buffer an increment and return this worker's unwritten delta for that counter"""
+        if field not in COUNTER_FIELDS:
+            raise ValueError(f'Unknown artwork counter: {field}')
+        self._ensure_started()
+
+        with self._condition:
+            self._pending[artwork_id][field] += amount
+            self._pending_count += amount
+            self.added_count += amount
+            if self._pending_count >= self.max_pending:
+                self._condition.notify_all()
+            return self._pending[artwork_id][field] + self._in_flight.get(artwork_id, {}).get(field, 0)
+
+    def pending(self, artwork_id: int) -> Optional[Dict[str, int]]:
+        """Deltas not yet persisted for one artwork, or None when there are none"""
+        with self._condition:
+            pending = self._pending.get(artwork_id)
+            in_flight = self._in_flight.get(artwork_id)
+        if pending is None and in_flight is None:
+            return None
+        return {
+            field: (pending or {}).get(field, 0) + (in_flight or {}).get(field, 0)
+            for field in COUNTER_FIELDS
+        }
+
+    def flush(self):
+        """Write everything pending so far on the calling thread"""
+        with self._flush_lock:
+            with self._condition:
+                deltas = self._take()
+            if deltas:
+                self._write(deltas)
+
+    def shutdown(self):
+        """Stop the flusher thread and write out anything still pending"""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+
+        if self._is_running():
+            self._thread.join(timeout=self.flush_interval + 5)
+
+        self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'pending_increments': self._pending_count,
+            'pending_artworks': len(self._pending),
+            'max_pending': self.max_pending,
+            'flush_interval': self.flush_interval,
+            'added': self.added_count,
+            'flushed': self.flushed_count,
+            'flushes': self.flush_count,
+            'failed_flushes': self.failed_flush_count,
+            'last_flush_ms': round(self.last_flush_seconds * 1000, 2),
+        }
+
+    def _take(self) -> Dict[int, Dict[str, int]]:
+        # Deltas stay visible to pending() until they are committed
+        deltas = dict(self._pending)
+        self._pending.clear()
+        self._pending_count = 0
+        self._in_flight = deltas
+        return deltas
+
+    def _write(self, deltas: Dict[int, Dict[str, int]]):
+        started = time.perf_counter()
+        groups = defaultdict(list)
+        for artwork_id, counts in deltas.items():
+            groups[tuple(counts[field] for field in COUNTER_FIELDS)].append(artwork_id)
+
+        # The lock is taken before the commit and released once the deltas are
+        # no longer in flight, so pending() never counts committed deltas twice
+        locked = False
+        try:
+            with transaction.atomic():
+                for amounts, artwork_ids in groups.items():
+                    Artwork.objects.filter(id__in=artwork_ids).update(**{
+                        field: F(field) + amount for field, amount in zip(COUNTER_FIELDS, amounts) if amount
+                    })
+                self._condition.acquire()
+                locked = True
+            self._in_flight = {}
+        except Exception:
+            logger.exception('Flushing counters for %d artworks failed, keeping them for the next flush', len(deltas))
+            with self._condition:
+                for artwork_id, counts in deltas.items():
+                    for field, amount in counts.items():
+                        self._pending[artwork_id][field] += amount
+                        self._pending_count += amount
+                self._in_flight = {}
+            self.failed_flush_count += 1
+            return
+        finally:
+            if locked:
+                self._condition.release()
+
+        self.flushed_count += sum(sum(counts.values()) for counts in deltas.values())
+        self.flush_count += 1
+        self.last_flush_seconds = time.perf_counter() - started
+
+        if counters_flushed.has_listeners(Artwork):
+            counts = {
+                artwork_id: {'views': views, 'likes': likes}
+                for artwork_id, views, likes in Artwork.objects.filter(id__in=list(deltas)).values_list(
+                    'id', *COUNTER_FIELDS
+                )
+            }
+            counters_flushed.send(sender=Artwork, counts=counts)
+
+    def _ensure_started(self):
+        if self._is_running():
+            return
+
+        with self._condition:
+            if self._is_running():
+                return
+            if self._thread is None:
+                atexit.register(self.shutdown)
+            self._pid = os.getpid()
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name='artwork-counter-flusher', daemon=True)
+            self._thread.start()
+
+    def _is_running(self):
+        # A thread started before a fork does not exist in the child worker
+        return self._thread is not None and self._pid == os.getpid() and self._thread.is_alive()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(
+                    lambda: self._stopping or self._pending_count >= self.max_pending,
+                    timeout=self.flush_interval,
+                )
+                if self._stopping:
+                    return
+
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Artwork counter flush failed')
+
+
+_config = getattr(settings, 'ARTWORK_COUNTERS', {})
+artwork_counters = ArtworkCounterBuffer(
+    flush_interval=_config.get('FLUSH_INTERVAL', 5.0),
+    max_pending=_config.get('MAX_PENDING', 100),
+)
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from artworks.models import Artwork
+from artworks.pricing import REPRICE_CHUNK_SIZE, due_artwork_ids, refresh_effective_prices
+
+
+class Command(BaseCommand):
+    help = ('Apply promotions that have started or ended to artwork effective prices. Web workers do this '
+            'every ARTWORK_PRICING REFRESH_INTERVAL seconds; run with --all after deploying')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help='Recompute every artwork, not just those with a promotion boundary due')
+        parser.add_argument('--chunk-size', type=int, default=REPRICE_CHUNK_SIZE,
+                            help='Artworks repriced per batch')
+
+    def handle(self, *args, **options):
+        if options['all']:
+            artwork_ids = list(Artwork.objects.values_list('id', flat=True))
+        else:
+            artwork_ids = list(due_artwork_ids())
+
+        chunk_size = options['chunk_size']
+        updated = 0
+        for start in range(0, len(artwork_ids), chunk_size):
+            updated += refresh_effective_prices(artwork_ids[start:start + chunk_size])
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Checked {len(artwork_ids)} artworks, updated {updated} effective prices')
+        )
@@ -0,0 +1,80 @@
+from django.db import migrations
+
+# Postgres keeps a weighted tsvector as a generated column, so every write
+# path (save, update(), raw SQL) keeps it current
+POSTGRES_FORWARD = [
+    """
+    ALTER TABLE artworks_artwork ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(tags, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'C')
+    ) STORED
+    """,
+    'CREATE INDEX artworks_artwork_search_vector_gin ON artworks_artwork USING GIN (search_vector)',
+]
+
+POSTGRES_REVERSE = [
+    'DROP INDEX IF EXISTS artworks_artwork_search_vector_gin',
+    'ALTER TABLE artworks_artwork DROP COLUMN IF EXISTS search_vector',
+]
+
+# SQLite mirrors the searchable columns into an external-content FTS5 table
+# kept in step by triggers. A migration that rebuilds artworks_artwork on
+# SQLite drops these triggers, so such a migration must recreate them.
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE artworks_artwork_fts USING fts5(
+        title, tags, description, content='artworks_artwork', content_rowid='id'
+    )
+    """,
+    """
+    CREATE TRIGGER artworks_artwork_fts_insert AFTER INSERT ON artworks_artwork BEGIN
+        INSERT INTO artworks_artwork_fts (rowid, title, tags, description)
+        VALUES (new.id, new.title, new.tags, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER artworks_artwork_fts_delete AFTER DELETE ON artworks_artwork BEGIN
+        INSERT INTO artworks_artwork_fts (artworks_artwork_fts, rowid, title, tags, description)
+        VALUES ('delete', old.id, old.title, old.tags, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER artworks_artwork_fts_update AFTER UPDATE OF title, tags, description ON artworks_artwork BEGIN
+        INSERT INTO artworks_artwork_fts (artworks_artwork_fts, rowid, title, tags, description)
+        VALUES ('delete', old.id, old.title, old.tags, old.description);
+        INSERT INTO artworks_artwork_fts (rowid, title, tags, description)
+        VALUES (new.id, new.title, new.tags, new.description);
+    END
+    """,
+    "INSERT INTO artworks_artwork_fts (artworks_artwork_fts) VALUES ('rebuild')",
+]
+
+SQLITE_REVERSE = [
+    'DROP TRIGGER IF EXISTS artworks_artwork_fts_insert',
+    'DROP TRIGGER IF EXISTS artworks_artwork_fts_delete',
+    'DROP TRIGGER IF EXISTS artworks_artwork_fts_update',
+    'DROP TABLE IF EXISTS artworks_artwork_fts',
+]
+
+
+def run_for_vendor(postgres, sqlite):
+    def run(apps, schema_editor):
+        statements = {'postgresql': postgres, 'sqlite': sqlite}.get(schema_editor.connection.vendor, [])
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('artworks', '0002_promotion_remove_artworkimage_artwork_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_for_vendor(POSTGRES_FORWARD, SQLITE_FORWARD),
+            run_for_vendor(POSTGRES_REVERSE, SQLITE_REVERSE),
+        ),
+    ]
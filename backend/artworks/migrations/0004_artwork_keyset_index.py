@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-17 20:55
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('artworks', '0003_artwork_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='artwork',
+            index=models.Index(fields=['status', '-created_at', '-id'], name='artwork_status_created_idx'),
+        ),
+    ]
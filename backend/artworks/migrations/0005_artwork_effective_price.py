@@ -0,0 +1,52 @@
+# Generated by Django 5.2.6 on 2026-10-17 20:57
+
+import importlib
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+from django.utils import timezone
+
+
+def backfill_effective_price(apps, schema_editor):
+    # Start from the list price and mark every row due, so the next
+    # refresh_effective_prices run applies running promotions
+    Artwork = apps.get_model('artworks', 'Artwork')
+    Artwork.objects.update(effective_price=F('price'), effective_price_until=timezone.now())
+
+
+def restore_fts_triggers(apps, schema_editor):
+    # Removing the columns rebuilds artworks_artwork on SQLite, which drops
+    # the full-text triggers from 0003, so recreate them when unapplying
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    search_index = importlib.import_module('artworks.migrations.0003_artwork_search_index')
+    for statement in search_index.SQLITE_FORWARD[1:]:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('artworks', '0004_artwork_keyset_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, restore_fts_triggers),
+        migrations.AddField(
+            model_name='artwork',
+            name='effective_price',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='artwork',
+            name='effective_price_until',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='artwork',
+            index=models.Index(fields=['status', 'effective_price'], name='artwork_status_price_idx'),
+        ),
+        migrations.RunPython(backfill_effective_price, migrations.RunPython.noop),
+    ]
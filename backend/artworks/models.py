@@ -5,6 +5,24 @@ from django.utils import timezone
 
 User = get_user_model()
 
+
+class ArtworkQuerySet(models.QuerySet):
+    def with_listing_data(self):
+        """Load the artist and the currently running promotions in a fixed number of queries
+
+        Running promotions land on each artwork as `active_promotions`, newest
+        first, which ArtworkSerializer uses for the discounted price.
+        """
+        now = timezone.now()
+        return self.select_related('artist').prefetch_related(
+            models.Prefetch(
+                'promotions',
+                queryset=Promotion.objects.filter(is_active=True, start_date__lte=now, end_date__gte=now),
+                to_attr='active_promotions',
+            )
+        )
+
+
 class Artwork(models.Model):
     CATEGORY_CHOICES = [
         ('painting', 'Painting'),
@@ -40,20 +58,33 @@ class Artwork(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     is_featured = models.BooleanField(default=False)
     tags = models.CharField(max_length=500, blank=True, help_text="Comma-separated tags")
+    # Price after the running promotion, maintained by artworks.pricing
+    effective_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, editable=False)
+    effective_price_until = models.DateTimeField(null=True, blank=True, editable=False, db_index=True)
+
+    objects = ArtworkQuerySet.as_manager()
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination over the public feed seeks on (created_at, id)
+            models.Index(fields=['status', '-created_at', '-id'], name='artwork_status_created_idx'),
+            models.Index(fields=['status', 'effective_price'], name='artwork_status_price_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} by {self.artist.username}"
 
     def increment_views(self):
+        # Buffered and written later with an F() update, see artworks.counters
+        from .counters import artwork_counters
+        artwork_counters.add(self.id, 'views')
         self.views += 1
-        self.save(update_fields=['views'])
 
     def increment_likes(self):
+        from .counters import artwork_counters
+        artwork_counters.add(self.id, 'likes')
         self.likes += 1
-        self.save(update_fields=['likes'])
 
 
 class Promotion(models.Model):
@@ -0,0 +1,134 @@
+import base64
+import json
+from collections import OrderedDict
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Cursor pagination on (created_at, id), newest first
+
+    Each page is a single indexed range query from the cursor position, so
+    deep pages cost the same as the first and rows inserted while scrolling
+    never shift or repeat results. Cursors are opaque base64 tokens holding
+    the boundary row's keys and the direction. The total count costs a
+    separate COUNT(*) and is only returned when asked for with ?count=true.
+    """
+
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.count = queryset.count() if request.query_params.get('count') == 'true' else None
+
+        cursor = self.decode_cursor(request)
+        reverse = False
+        if cursor is not None:
+            created_at, pk, reverse = cursor
+            if reverse:
+                queryset = queryset.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk))
+            else:
+                queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+
+        ordering = ('created_at', 'id') if reverse else ('-created_at', '-id')
+        rows = list(queryset.order_by(*ordering)[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        self.page = rows
+        # Moving back means there are rows ahead; moving forward means we came from somewhere
+        self.has_next = has_more if not reverse else True
+        self.has_previous = (has_more if reverse else cursor is not None) and bool(rows)
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return api_settings.PAGE_SIZE
+        return max(1, min(size, self.max_page_size))
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            data = json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+            created_at = parse_datetime(data['c'])
+            if created_at is None:
+                raise ValueError
+            return created_at, int(data['i']), bool(data.get('r'))
+        except (TypeError, ValueError, KeyError):
+            raise NotFound('Invalid cursor')
+
+    def encode_cursor(self, row, reverse: bool) -> str:
+        data = {'c': row.created_at.isoformat(), 'i': row.id}
+        if reverse:
+            data['r'] = 1
+        return base64.urlsafe_b64encode(json.dumps(data, separators=(',', ':')).encode()).decode()
+
+    def _link(self, cursor):
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, 'count')
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self._link(self.encode_cursor(self.page[-1], reverse=False))
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self._link(self.encode_cursor(self.page[0], reverse=True))
+
+    def get_paginated_response(self, data):
+        body = OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ])
+        if self.count is not None:
+            body['count'] = self.count
+            body.move_to_end('count', last=False)
+        return Response(body)
+
+
+class PublicArtworkPagination(PageNumberPagination):
+    """Page numbers by default; ?pagination=cursor or a cursor switches to keyset paging
+
+    Keyset pages always follow (created_at, id) newest first. Search still
+    filters in cursor mode but its results come newest first rather than by
+    relevance, and any other sort is rejected rather than silently ignored.
+    """
+
+    @staticmethod
+    def uses_cursor(request) -> bool:
+        return request.query_params.get('pagination') == 'cursor' or KeysetPagination.cursor_query_param in request.query_params
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.uses_cursor(request):
+            if request.query_params.get('sort') not in (None, '', 'newest'):
+                raise ValidationError({
+                    'sort': 'Cursor pagination only supports sort=newest; use page numbers for other sorts'
+                })
+            self.keyset = KeysetPagination()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        self.keyset = None
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
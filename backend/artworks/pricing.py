@@ -0,0 +1,93 @@
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from recommendations.refresh import BackgroundRefresher
+
+from .models import Artwork, Promotion
+
+CENT = Decimal('0.01')
+
+# Artworks repriced per refresh_effective_prices call
+REPRICE_CHUNK_SIZE = 1000
+
+
+def discounted(price: Decimal, discount_percentage: int) -> Decimal:
+    """Same arithmetic as Promotion.get_discounted_price, rounded to the column's precision"""
+    return (price - price * discount_percentage / 100).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def refresh_effective_prices(artwork_ids: Optional[Iterable[int]] = None, now=None) -> int:
+    """Recompute effective_price and effective_price_until for the given artworks
+
+    The running promotion that ArtworkSerializer would pick (the newest one)
+    sets the price. effective_price_until is the next moment that price can
+    change: the end of a running promotion or the start of an upcoming one.
+    Only rows whose values changed are written. Returns how many were.
+    """
+    now = now or timezone.now()
+    artworks = Artwork.objects.only('id', 'price', 'effective_price', 'effective_price_until')
+    if artwork_ids is not None:
+        artworks = artworks.filter(id__in=list(artwork_ids))
+    artworks = {artwork.id: artwork for artwork in artworks}
+    if not artworks:
+        return 0
+
+    links = Promotion.artworks.through.objects.filter(
+        artwork_id__in=list(artworks), promotion__is_active=True, promotion__end_date__gte=now
+    ).values_list(
+        'artwork_id', 'promotion__discount_percentage', 'promotion__start_date',
+        'promotion__end_date', 'promotion__created_at',
+    )
+
+    running = {}
+    until = {}
+    for artwork_id, percentage, start_date, end_date, created_at in links:
+        if start_date <= now:
+            if artwork_id not in running or created_at > running[artwork_id][1]:
+                running[artwork_id] = (percentage, created_at)
+            boundary = end_date
+        else:
+            boundary = start_date
+        if artwork_id not in until or boundary < until[artwork_id]:
+            until[artwork_id] = boundary
+
+    changed = []
+    for artwork_id, artwork in artworks.items():
+        price = artwork.price
+        if artwork_id in running:
+            price = discounted(price, running[artwork_id][0])
+        if artwork.effective_price != price or artwork.effective_price_until != until.get(artwork_id):
+            artwork.effective_price = price
+            artwork.effective_price_until = until.get(artwork_id)
+            changed.append(artwork)
+
+    Artwork.objects.bulk_update(changed, ['effective_price', 'effective_price_until'], batch_size=500)
+    return len(changed)
+
+
+def due_artwork_ids(now=None):
+    """Artworks a promotion has started or ended for since their price was computed"""
+    now = now or timezone.now()
+    return Artwork.objects.filter(
+        Q(effective_price_until__lte=now) | Q(effective_price__isnull=True)
+    ).values_list('id', flat=True)
+
+
+def reprice_due_artworks(chunk_size: int = REPRICE_CHUNK_SIZE) -> int:
+    """Apply promotions that have started or ended since prices were computed"""
+    artwork_ids = list(due_artwork_ids())
+    updated = 0
+    for start in range(0, len(artwork_ids), chunk_size):
+        updated += refresh_effective_prices(artwork_ids[start:start + chunk_size])
+    return updated
+
+
+_config = getattr(settings, 'ARTWORK_PRICING', {})
+# Started by the views that filter and sort on effective_price
+price_refresher = BackgroundRefresher(
+    reprice_due_artworks, _config.get('REFRESH_INTERVAL', 60), name='effective-price-refresher'
+)
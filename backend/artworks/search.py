@@ -0,0 +1,72 @@
+import re
+
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Q, QuerySet
+from django.db.models.expressions import RawSQL
+
+# bm25 column weights for the SQLite index, matching Postgres' A/B/C weights
+SQLITE_WEIGHTS = (10.0, 5.0, 1.0)
+
+_fts_available = None
+
+
+def _sqlite_fts_available() -> bool:
+    global _fts_available
+    if _fts_available is None:
+        _fts_available = 'artworks_artwork_fts' in connection.introspection.table_names()
+    return _fts_available
+
+
+def _fts5_query(search: str) -> str:
+    """Quote every word so user input cannot inject FTS5 syntax; words are ANDed and prefix matched"""
+    words = re.findall(r'\w+', search)
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def search_artworks(queryset: QuerySet, search: str, ranked: bool = True) -> QuerySet:
+    """Filter artworks by full-text search, best matches first
+
+    Title matches outrank tags, which outrank the description. Uses the
+    generated tsvector column and its GIN index on Postgres and the FTS5
+    table on SQLite, falling back to icontains elsewhere. With ranked=False
+    only the match filter is applied and the ordering is left alone.
+    """
+    if connection.vendor == 'postgresql':
+        queryset = queryset.alias(
+            search_match=RawSQL(
+                "artworks_artwork.search_vector @@ websearch_to_tsquery('english', %s)",
+                (search,), output_field=BooleanField()
+            )
+        ).filter(search_match=True)
+        if not ranked:
+            return queryset
+        return queryset.annotate(
+            search_rank=RawSQL(
+                "ts_rank_cd(artworks_artwork.search_vector, websearch_to_tsquery('english', %s))",
+                (search,), output_field=FloatField()
+            )
+        ).order_by('-search_rank', '-created_at')
+
+    if connection.vendor == 'sqlite' and _sqlite_fts_available():
+        match = _fts5_query(search)
+        if not match:
+            return queryset.none()
+        queryset = queryset.filter(
+            id__in=RawSQL('SELECT rowid FROM artworks_artwork_fts WHERE artworks_artwork_fts MATCH %s', (match,))
+        )
+        if not ranked:
+            return queryset
+        # bm25() is lower for better matches, so negate it to sort like ts_rank
+        return queryset.annotate(
+            search_rank=RawSQL(
+                'SELECT -bm25(artworks_artwork_fts, %s, %s, %s) FROM artworks_artwork_fts '
+                'WHERE artworks_artwork_fts MATCH %s AND rowid = artworks_artwork.id',
+                (*SQLITE_WEIGHTS, match), output_field=FloatField()
+            )
+        ).order_by('-search_rank', '-created_at')
+
+    return queryset.filter(
+        Q(title__icontains=search) |
+        Q(description__icontains=search) |
+        Q(tags__icontains=search)
+    )
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.utils import timezone
+from .counters import COUNTER_FIELDS, artwork_counters
 from .models import Artwork, Promotion
 
 User = get_user_model()
@@ -16,9 +17,10 @@ class ArtworkSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'title', 'description', 'category', 'price', 'image_url',
             'status', 'views', 'likes', 'created_at', 'updated_at',
-            'is_featured', 'tags', 'artist_name', 'artist_username', 'discounted_price'
+            'is_featured', 'tags', 'artist_name', 'artist_username', 'discounted_price',
+            'effective_price'
         ]
-        read_only_fields = ['artist', 'views', 'likes', 'created_at', 'updated_at']
+        read_only_fields = ['artist', 'views', 'likes', 'created_at', 'updated_at', 'effective_price']
 
     def get_image_url(self, obj):
         if obj.image:
@@ -29,17 +31,30 @@ class ArtworkSerializer(serializers.ModelSerializer):
         return None
 
     def get_discounted_price(self, obj):
-        # Get active promotion for this artwork
-        active_promotion = obj.promotions.filter(
-            is_active=True,
-            start_date__lte=timezone.now(),
-            end_date__gte=timezone.now()
-        ).first()
+        # Use the promotions prefetched by with_listing_data() when available
+        active_promotions = getattr(obj, 'active_promotions', None)
+        if active_promotions is not None:
+            active_promotion = active_promotions[0] if active_promotions else None
+        else:
+            active_promotion = obj.promotions.filter(
+                is_active=True,
+                start_date__lte=timezone.now(),
+                end_date__gte=timezone.now()
+            ).first()
         
         if active_promotion:
             return active_promotion.get_discounted_price(obj.price)
         return obj.price
 
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # Include view and like increments this worker has not written yet
+        pending = artwork_counters.pending(instance.id)
+        if pending:
+            for field in COUNTER_FIELDS:
+                data[field] += pending[field]
+        return data
+
     def create(self, validated_data):
         # Set the artist to the current user
         validated_data['artist'] = self.context['request'].user
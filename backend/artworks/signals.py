@@ -0,0 +1,64 @@
+from django.db.models import DEFERRED
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save, pre_delete
+from django.dispatch import receiver
+
+from .models import Artwork, Promotion
+from .pricing import refresh_effective_prices
+
+# Artwork fields a save must change before its effective price is recomputed
+PRICING_FIELDS = ('price', 'status')
+
+
+def _promotion_artwork_ids(promotion):
+    return list(promotion.artworks.values_list('id', flat=True))
+
+
+def _pricing_state(instance):
+    # Read __dict__ so deferred fields are not loaded with a query per row
+    return {field: instance.__dict__.get(field, DEFERRED) for field in PRICING_FIELDS}
+
+
+@receiver(post_init, sender=Artwork)
+def remember_pricing_state(sender, instance, **kwargs):
+    instance._pricing_state = _pricing_state(instance)
+
+
+@receiver(post_save, sender=Artwork)
+def price_saved_artwork(sender, instance, created, update_fields=None, **kwargs):
+    """Reprice new artworks and saves that change the list price or status"""
+    current = _pricing_state(instance)
+    changed = False
+    for field in PRICING_FIELDS:
+        if update_fields is None or field in update_fields:
+            changed |= current[field] != instance._pricing_state[field]
+            instance._pricing_state[field] = current[field]
+    if created or changed:
+        refresh_effective_prices([instance.id])
+        instance.refresh_from_db(fields=['effective_price', 'effective_price_until'])
+
+
+@receiver(post_save, sender=Promotion)
+def reprice_promotion_artworks(sender, instance, **kwargs):
+    # Dates, discount or is_active may have changed
+    refresh_effective_prices(_promotion_artwork_ids(instance))
+
+
+@receiver(pre_delete, sender=Promotion)
+def remember_promotion_artworks(sender, instance, **kwargs):
+    instance._priced_artwork_ids = _promotion_artwork_ids(instance)
+
+
+@receiver(post_delete, sender=Promotion)
+def reprice_deleted_promotion_artworks(sender, instance, **kwargs):
+    refresh_effective_prices(getattr(instance, '_priced_artwork_ids', []))
+
+
+@receiver(m2m_changed, sender=Promotion.artworks.through)
+def reprice_promotion_membership(sender, instance, action, reverse, pk_set, **kwargs):
+    """Reprice artworks added to or removed from a promotion, from either side of the relation"""
+    if action == 'pre_clear':
+        instance._priced_artwork_ids = [instance.id] if reverse else _promotion_artwork_ids(instance)
+    elif action == 'post_clear':
+        refresh_effective_prices(getattr(instance, '_priced_artwork_ids', []))
+    elif action in ('post_add', 'post_remove'):
+        refresh_effective_prices([instance.id] if reverse else pk_set)
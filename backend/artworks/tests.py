@@ -1,3 +1,104 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .models import Artwork, Promotion
+
+User = get_user_model()
+
+
+class ArtworkListQueryCountTests(TestCase):
+    """Serializing a page of artworks must not issue queries per artwork"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.artist = User.objects.create_user(username='painter', email='painter@example.com', password='pw')
+        now = timezone.now()
+        running = Promotion.objects.create(
+            artist=cls.artist, title='Spring sale', description='', discount_percentage=20,
+            start_date=now - timedelta(days=1), end_date=now + timedelta(days=1),
+        )
+        expired = Promotion.objects.create(
+            artist=cls.artist, title='Old sale', description='', discount_percentage=50,
+            start_date=now - timedelta(days=10), end_date=now - timedelta(days=5),
+        )
+        artworks = [
+            Artwork.objects.create(
+                artist=cls.artist, title=f'Artwork {i}', category='painting', price=Decimal('100.00'), status='active'
+            )
+            for i in range(15)
+        ]
+        running.artworks.set(artworks[:5])
+        expired.artworks.set(artworks)
+        cls.promoted_ids = {artwork.id for artwork in artworks[:5]}
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def assert_discounts(self, results):
+        for item in results:
+            expected = Decimal('80.00') if item['id'] in self.promoted_ids else Decimal('100.00')
+            self.assertEqual(Decimal(str(item['discounted_price'])), expected)
+
+    def test_public_list_page(self):
+        # count, page, running promotions
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/public/artworks/')
+        self.assertEqual(len(response.data['results']), 12)
+        self.assert_discounts(response.data['results'])
+
+    def test_public_list_cursor_page(self):
+        # page, running promotions
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/public/artworks/?pagination=cursor')
+        self.assertEqual(len(response.data['results']), 12)
+        self.assert_discounts(response.data['results'])
+
+    def test_artist_list_page(self):
+        self.client.force_authenticate(self.artist)
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/artworks/')
+        self.assertEqual(len(response.data['results']), 12)
+        self.assert_discounts(response.data['results'])
+
+    def test_artist_detail(self):
+        self.client.force_authenticate(self.artist)
+        artwork_id = min(self.promoted_ids)
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/api/artworks/{artwork_id}/')
+        self.assertEqual(Decimal(str(response.data['discounted_price'])), Decimal('80.00'))
+
+
+class PublicArtworkCursorTests(TestCase):
+    """Cursor pages only follow the newest-first order"""
+
+    @classmethod
+    def setUpTestData(cls):
+        artist = User.objects.create_user(username='sculptor', email='sculptor@example.com', password='pw')
+        cls.artworks = [
+            Artwork.objects.create(
+                artist=artist, title=title, category='sculpture', price=Decimal('50.00'), status='active'
+            )
+            for title in ('Marble bust', 'Bronze horse', 'Marble hand')
+        ]
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_search_results_come_newest_first(self):
+        response = self.client.get('/api/public/artworks/?pagination=cursor&search=marble')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [item['id'] for item in response.data['results']],
+            [self.artworks[2].id, self.artworks[0].id],
+        )
 
-# Create your tests here.
+    def test_rejects_other_sorts(self):
+        response = self.client.get('/api/public/artworks/?pagination=cursor&sort=price-low')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get('/api/public/artworks/?pagination=cursor&sort=newest')
+        self.assertEqual(response.status_code, 200)
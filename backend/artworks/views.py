@@ -4,8 +4,11 @@ from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
 from django.contrib.auth import get_user_model
 from django.utils import timezone
-from django.db.models import Q
+from .counters import artwork_counters
 from .models import Artwork, Promotion
+from .pagination import PublicArtworkPagination
+from .pricing import price_refresher
+from .search import search_artworks
 from .serializers import (
     ArtworkSerializer, ArtworkCreateSerializer,
     PromotionSerializer, PromotionCreateSerializer
@@ -21,7 +24,7 @@ class ArtworkListCreateView(generics.ListCreateAPIView):
     def get_queryset(self):
         user = self.request.user
         if user.is_authenticated:
-            return Artwork.objects.filter(artist=user).order_by('-created_at')
+            return Artwork.objects.filter(artist=user).with_listing_data().order_by('-created_at')
         return Artwork.objects.none()
 
     def get_serializer_class(self):
@@ -38,7 +41,7 @@ class ArtworkDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return Artwork.objects.filter(artist=self.request.user)
+        return Artwork.objects.filter(artist=self.request.user).with_listing_data()
 
     def get_serializer_class(self):
         if self.request.method in ['PUT', 'PATCH']:
@@ -50,32 +53,45 @@ class PublicArtworkListView(generics.ListAPIView):
     """Public view for browsing all artworks"""
     serializer_class = ArtworkSerializer
     permission_classes = [permissions.AllowAny]
+    pagination_class = PublicArtworkPagination
+
+    SORT_ORDERINGS = {
+        'newest': ('-created_at', '-id'),
+        'oldest': ('created_at', 'id'),
+        'price-low': ('effective_price', 'id'),
+        'price-high': ('-effective_price', '-id'),
+        'popular': ('-likes', '-id'),
+    }
 
     def get_queryset(self):
-        queryset = Artwork.objects.filter(status='active').order_by('-created_at')
+        # Keeps effective_price current as promotions start and end
+        price_refresher.ensure_started()
+        queryset = Artwork.objects.filter(status='active').with_listing_data().order_by('-created_at')
         
         # Filter by category
         category = self.request.query_params.get('category', None)
         if category:
             queryset = queryset.filter(category=category)
         
-        # Search by title or description
+        # Full-text search over title, tags and description, ranked by relevance
+        # except in cursor mode, where pages are always newest first
         search = self.request.query_params.get('search', None)
         if search:
-            queryset = queryset.filter(
-                Q(title__icontains=search) | 
-                Q(description__icontains=search) |
-                Q(tags__icontains=search)
-            )
+            queryset = search_artworks(queryset, search, ranked=not PublicArtworkPagination.uses_cursor(self.request))
         
-        # Filter by price range
+        # Filter by price range, after any running promotion
         min_price = self.request.query_params.get('min_price', None)
         max_price = self.request.query_params.get('max_price', None)
         
         if min_price:
-            queryset = queryset.filter(price__gte=min_price)
+            queryset = queryset.filter(effective_price__gte=min_price)
         if max_price:
-            queryset = queryset.filter(price__lte=max_price)
+            queryset = queryset.filter(effective_price__lte=max_price)
+        
+        # Sort; search results stay ranked by relevance unless a sort is asked for
+        sort = self.request.query_params.get('sort', None)
+        if sort in self.SORT_ORDERINGS:
+            queryset = queryset.order_by(*self.SORT_ORDERINGS[sort])
         
         return queryset
 
@@ -84,24 +100,23 @@ class PublicArtworkListView(generics.ListAPIView):
 @permission_classes([permissions.IsAuthenticated])
 def increment_artwork_views(request, artwork_id):
     """Increment view count for an artwork"""
-    try:
-        artwork = Artwork.objects.get(id=artwork_id)
-        artwork.increment_views()
-        return Response({'views': artwork.views}, status=status.HTTP_200_OK)
-    except Artwork.DoesNotExist:
-        return Response({'error': 'Artwork not found'}, status=status.HTTP_404_NOT_FOUND)
+    return _increment_counter(artwork_id, 'views')
 
 
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def like_artwork(request, artwork_id):
     """Like an artwork"""
-    try:
-        artwork = Artwork.objects.get(id=artwork_id)
-        artwork.increment_likes()
-        return Response({'likes': artwork.likes}, status=status.HTTP_200_OK)
-    except Artwork.DoesNotExist:
+    return _increment_counter(artwork_id, 'likes')
+
+
+def _increment_counter(artwork_id, field):
+    """Buffer one increment and answer with the persisted count plus pending increments"""
+    persisted = Artwork.objects.filter(id=artwork_id).values_list(field, flat=True).first()
+    if persisted is None:
         return Response({'error': 'Artwork not found'}, status=status.HTTP_404_NOT_FOUND)
+    unwritten = artwork_counters.add(artwork_id, field)
+    return Response({field: persisted + unwritten}, status=status.HTTP_200_OK)
 
 
 class PromotionListCreateView(generics.ListCreateAPIView):
@@ -5,4 +5,8 @@ set -o errexit
 pip install -r requirements.txt
 python manage.py collectstatic --no-input
 python manage.py migrate
+python manage.py createcachetable
+python manage.py refresh_effective_prices --all
+# Fails the build without a shared cache such as Redis (REDIS_URL)
+python manage.py check --deploy --fail-level ERROR
 
@@ -0,0 +1,172 @@
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List
+
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+class BufferFull(Exception):
+    """Raised when the event buffer has no room for a batch within the timeout"""
+
+
+class BehaviorEventBuffer:
+    """Bounded in-process queue of behavior events written behind the request
+
+    Requests enqueue events and return straight away. A daemon thread drains
+    the queue through flush_callback once flush_size events are waiting or
+    every flush_interval seconds, whichever comes first. Whatever is still
+    queued when the worker exits is flushed by an atexit hook. A chunk whose
+    flush_callback raises is retried one event at a time, so the callback
+    must only raise when nothing was written.
+    """
+
+    def __init__(
+        self,
+        flush_callback: Callable[[List[Dict[str, Any]]], Any],
+        max_size: int = 10000,
+        flush_size: int = 500,
+        flush_interval: float = 2.0,
+        enqueue_timeout: float = 0.1,
+    ):
+        self.flush_callback = flush_callback
+        self.max_size = max_size
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+
+        self._events = deque()
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._stopping = False
+
+        self.enqueued_count = 0
+        self.flushed_count = 0
+        self.dropped_count = 0
+        self.rejected_count = 0
+        self.flush_count = 0
+        self.last_flush_seconds = 0.0
+        self.max_flush_seconds = 0.0
+        self.total_flush_seconds = 0.0
+
+    def put(self, events: List[Dict[str, Any]]):
+        """Queue a batch of events, waiting briefly for room when the buffer is full"""
+        self._ensure_started()
+
+        with self._condition:
+            has_room = self._condition.wait_for(
+                lambda: len(self._events) + len(events) <= self.max_size,
+                timeout=self.enqueue_timeout,
+            )
+            if not has_room:
+                self.rejected_count += len(events)
+                raise BufferFull(f'Event buffer is full ({len(self._events)} queued)')
+
+            self._events.extend(events)
+            self.enqueued_count += len(events)
+            if len(self._events) >= self.flush_size:
+                self._condition.notify_all()
+
+    def flush(self):
+        """Drain everything queued so far on the calling thread"""
+        with self._condition:
+            events = list(self._events)
+            self._events.clear()
+            self._condition.notify_all()
+
+        self._write(events)
+
+    def shutdown(self):
+        """Stop the flusher thread and write out anything still queued"""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+
+        if self._is_running():
+            self._thread.join(timeout=self.flush_interval + 5)
+
+        self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'queue_depth': len(self._events),
+            'max_size': self.max_size,
+            'enqueued': self.enqueued_count,
+            'flushed': self.flushed_count,
+            'dropped': self.dropped_count,
+            'rejected': self.rejected_count,
+            'flushes': self.flush_count,
+            'last_flush_ms': round(self.last_flush_seconds * 1000, 2),
+            'max_flush_ms': round(self.max_flush_seconds * 1000, 2),
+            'avg_flush_ms': round(self.total_flush_seconds * 1000 / self.flush_count, 2) if self.flush_count else 0.0,
+        }
+
+    def _ensure_started(self):
+        if self._is_running():
+            return
+
+        with self._condition:
+            if self._is_running():
+                return
+            if self._thread is None:
+                atexit.register(self.shutdown)
+            self._pid = os.getpid()
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name='behavior-event-flusher', daemon=True)
+            self._thread.start()
+
+    def _is_running(self):
+        # A thread started before a fork does not exist in the child worker
+        return self._thread is not None and self._pid == os.getpid() and self._thread.is_alive()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(
+                    lambda: self._stopping or len(self._events) >= self.flush_size,
+                    timeout=self.flush_interval,
+                )
+                if self._stopping:
+                    return
+                events = list(self._events)
+                self._events.clear()
+                self._condition.notify_all()
+
+            if events:
+                close_old_connections()
+                self._write(events)
+
+    def _write(self, events: List[Dict[str, Any]]):
+        with self._flush_lock:
+            for start in range(0, len(events), self.flush_size):
+                chunk = events[start:start + self.flush_size]
+                started = time.perf_counter()
+                try:
+                    self.flush_callback(chunk)
+                    self.flushed_count += len(chunk)
+                except Exception:
+                    logger.exception('Bulk flush of %d behavior events failed, retrying one by one', len(chunk))
+                    self._write_individually(chunk)
+
+                elapsed = time.perf_counter() - started
+                self.flush_count += 1
+                self.last_flush_seconds = elapsed
+                self.max_flush_seconds = max(self.max_flush_seconds, elapsed)
+                self.total_flush_seconds += elapsed
+
+    def _write_individually(self, events: List[Dict[str, Any]]):
+        # Keeps one bad event (e.g. a deleted user) from losing the whole chunk
+        for event in events:
+            try:
+                self.flush_callback([event])
+                self.flushed_count += 1
+            except Exception:
+                logger.exception('Dropping behavior event that could not be written')
+                self.dropped_count += 1
@@ -0,0 +1,225 @@
+import copy
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Any, Dict, List, Optional
+
+from django.core.cache import caches
+from django.core.cache.backends.db import DatabaseCache
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils import timezone
+
+from .models import RecommendationCache
+
+logger = logging.getLogger(__name__)
+
+
+def is_process_local(cache) -> bool:
+    """Whether a Django cache backend is private to this worker process"""
+    return isinstance(cache, (LocMemCache, DummyCache))
+
+
+class TierStats:
+    """Hit and miss counters for one cache tier"""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, hit: bool):
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class LRUCache:
+    """Bounded, thread-safe LRU with a per-entry TTL, local to one worker
+
+    get() returns a deep copy, so callers can mutate what they get back
+    without changing the cached entry.
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl: float = 60):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        return copy.deepcopy(value)
+
+    def set(self, key, value, ttl: Optional[float] = None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class TieredRecommendationCache:
+    """Per-user recommendation cache: local LRU, then Django cache, then database
+
+    The local tier is checked first and absorbs repeat requests without any
+    I/O. Its TTL is kept short because another worker's invalidation can only
+    clear the shared tiers. The RecommendationCache table is an optional
+    durable tier behind the configured Django cache backend.
+
+    The shared tier only bounds staleness when the Django cache really is
+    shared between workers. With a per-process backend such as LocMemCache
+    a warning is logged and the shared TTL drops to the local TTL.
+    """
+
+    key_prefix = 'recommendations:user'
+
+    def __init__(
+        self,
+        ttl: timedelta = timedelta(hours=6),
+        local_max_entries: int = 1000,
+        local_ttl: float = 60,
+        cache_alias: str = 'default',
+        use_database: bool = False,
+    ):
+        self.ttl = ttl
+        self.local = LRUCache(max_entries=local_max_entries, ttl=local_ttl)
+        self.cache_alias = cache_alias
+        self.shared_ttl = ttl
+        if is_process_local(self.shared):
+            self.shared_ttl = min(ttl, timedelta(seconds=local_ttl))
+            logger.warning(
+                "Cache '%s' is local to each worker, so recommendation invalidations only reach "
+                "the worker that handled the event; caching recommendations for %ss instead of %ss. "
+                "Configure a shared cache backend such as Redis.",
+                cache_alias, int(self.shared_ttl.total_seconds()), int(ttl.total_seconds()),
+            )
+        elif isinstance(self.shared, DatabaseCache):
+            logger.warning(
+                "Cache '%s' is a database table, so every local cache miss is a SQL query. "
+                "Set REDIS_URL to use Redis.",
+                cache_alias,
+            )
+        self.use_database = use_database
+        self.tier_stats = {
+            'local': TierStats(),
+            'shared': TierStats(),
+            'database': TierStats(),
+        }
+
+    @property
+    def shared(self):
+        return caches[self.cache_alias]
+
+    def _key(self, user_id: int) -> str:
+        return f'{self.key_prefix}:{user_id}'
+
+    def get(self, user_id: int) -> Optional[List[Dict[str, Any]]]:
+        key = self._key(user_id)
+
+        recommendations = self.local.get(key)
+        self.tier_stats['local'].record(recommendations is not None)
+        if recommendations is not None:
+            return recommendations
+
+        recommendations = self.shared.get(key)
+        self.tier_stats['shared'].record(recommendations is not None)
+        if recommendations is not None:
+            self.local.set(key, recommendations)
+            return recommendations
+
+        if not self.use_database:
+            return None
+
+        cached = RecommendationCache.objects.filter(
+            user_id=user_id,
+            expires_at__gt=timezone.now()
+        ).order_by('-created_at').values_list('recommendations', 'expires_at').first()
+        self.tier_stats['database'].record(cached is not None)
+        if cached is None:
+            return None
+
+        recommendations, expires_at = cached
+        remaining = (expires_at - timezone.now()).total_seconds()
+        timeout = min(remaining, self.shared_ttl.total_seconds())
+        self.shared.set(key, recommendations, timeout=max(int(timeout), 1))
+        self.local.set(key, recommendations)
+        return recommendations
+
+    def set(self, user_id: int, recommendations: List[Dict[str, Any]], algorithm_version: str = 'v1'):
+        self.set_many({user_id: recommendations}, algorithm_version)
+
+    def set_many(self, recommendations_by_user: Dict[int, List[Dict[str, Any]]], algorithm_version: str = 'v1'):
+        """Write several users' recommendations with one round-trip per tier"""
+        if not recommendations_by_user:
+            return
+
+        for user_id, recommendations in recommendations_by_user.items():
+            self.local.set(self._key(user_id), recommendations)
+
+        self.shared.set_many(
+            {self._key(user_id): recs for user_id, recs in recommendations_by_user.items()},
+            timeout=int(self.shared_ttl.total_seconds())
+        )
+
+        if self.use_database:
+            try:
+                expires_at = timezone.now() + self.ttl
+                RecommendationCache.objects.filter(user_id__in=list(recommendations_by_user)).delete()
+                RecommendationCache.objects.bulk_create([
+                    RecommendationCache(
+                        user_id=user_id,
+                        recommendations=recs,
+                        algorithm_version=algorithm_version,
+                        expires_at=expires_at
+                    )
+                    for user_id, recs in recommendations_by_user.items()
+                ])
+            except Exception:
+                # The durable tier is best effort, the faster tiers already hold the result
+                logger.exception('Failed to persist recommendations to the database cache')
+
+    def invalidate(self, user_id: int):
+        """Drop one user's cached recommendations from every tier"""
+        key = self._key(user_id)
+        self.local.delete(key)
+        self.shared.delete(key)
+        if self.use_database:
+            RecommendationCache.objects.filter(user_id=user_id).delete()
+
+    def stats(self) -> Dict[str, Any]:
+        tiers = {name: stats.as_dict() for name, stats in self.tier_stats.items()}
+        tiers['local']['entries'] = len(self.local)
+        if not self.use_database:
+            tiers.pop('database')
+        return tiers
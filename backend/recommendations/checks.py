@@ -0,0 +1,27 @@
+from django.core import checks
+from django.core.cache import caches
+from django.core.cache.backends.db import DatabaseCache
+
+from .cache import is_process_local
+from .conf import get_setting
+from .insights import ATOMIC_INCR_BACKENDS
+
+
+@checks.register(checks.Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """The recommendation cache, session views and insights need a fast cache every worker shares"""
+    alias = get_setting('CACHE_ALIAS')
+    cache = caches[alias]
+    if isinstance(cache, ATOMIC_INCR_BACKENDS):
+        return []
+    if is_process_local(cache):
+        problem = 'is local to each worker, so invalidations and session views do not reach the others'
+    elif isinstance(cache, DatabaseCache):
+        problem = 'is a database table, so every local cache miss and tracked event costs a SQL query'
+    else:
+        problem = 'does not support atomic increments across workers'
+    return [checks.Error(
+        f"Cache '{alias}' ({type(cache).__name__}) {problem}.",
+        hint='Set REDIS_URL to a Redis instance shared by every web worker.',
+        id='recommendations.E001',
+    )]
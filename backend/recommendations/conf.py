@@ -0,0 +1,75 @@
+import os
+
+from django.conf import settings
+
+# Defaults for the RECOMMENDATIONS settings dict
+DEFAULTS = {
+    # Queue tracked events in memory and write them from a background thread
+    'BUFFERED_TRACKING': False,
+    'EVENT_BUFFER_MAX_SIZE': 10000,
+    'EVENT_BUFFER_FLUSH_SIZE': 500,
+    'EVENT_BUFFER_FLUSH_INTERVAL': 2.0,
+    # How long a request waits for room in a full buffer before getting a 503
+    'EVENT_BUFFER_ENQUEUE_TIMEOUT': 0.1,
+    # Per-worker LRU in front of the Django cache; short TTL bounds staleness
+    # after another worker invalidates a user
+    'LOCAL_CACHE_MAX_ENTRIES': 1000,
+    'LOCAL_CACHE_TTL': 60,
+    'CACHE_ALIAS': 'default',
+    # Also keep recommendations in the RecommendationCache table
+    'CACHE_USE_DATABASE': False,
+    # Per-worker cache of artwork metadata for hydrating candidates
+    'HYDRATION_CACHE_MAX_ENTRIES': 5000,
+    'HYDRATION_CACHE_TTL': 300,
+    # Seconds before the content feature matrix is rebuilt from the database
+    'FEATURE_MATRIX_MAX_AGE': 600,
+    # Where train_recommendation_model writes versioned factor artifacts
+    'MODEL_DIR': os.path.join(settings.BASE_DIR, 'recommendation_models'),
+    # Seconds between checks for a newly published model
+    'MODEL_CHECK_INTERVAL': 60,
+    # Like/purchase weight halves every N days in the popularity table
+    'POPULARITY_HALF_LIFE_DAYS': 7,
+    # 'exact' scores every user sharing a category or artist; 'minhash' uses LSH buckets
+    'SIMILAR_USERS_MODE': 'exact',
+    # Artist LSH banding for 'minhash': more bands or fewer rows per band raise
+    # recall and latency; the signature is 24 + MINHASH_BANDS * MINHASH_ROWS
+    # uint32 values. 'minhash' is approximate: on benchmark_recommendations
+    # (2000 users, 200k events) 24x3 finds ~59% of the exact top 10 at about
+    # 1/20 of the lookup time, and 32x2 ~63% at 1/9. Keep 'exact' when
+    # neighbour quality matters more than lookup latency.
+    'MINHASH_BANDS': 24,
+    'MINHASH_ROWS': 3,
+    # Session co-visitation: views from the last N days, top neighbours kept
+    # per artwork, and how many recent views of a session are paired
+    'COVISITATION_DAYS': 7,
+    'COVISITATION_NEIGHBOURS': 50,
+    'COVISITATION_SESSION_LENGTH': 20,
+    'COVISITATION_SESSION_TTL': 1800,
+    # Trending searches: queries kept per ranking, window length in seconds,
+    # and how often each worker merges its counts into the database
+    'TRENDING_SEARCH_CAPACITY': 200,
+    'TRENDING_SEARCH_WINDOW': 3600,
+    'TRENDING_SEARCH_CHECKPOINT_INTERVAL': 60,
+    # Anonymous feed: artworks per feed, rebuild period and browser cache lifetime
+    'GLOBAL_FEED_SIZE': 48,
+    'GLOBAL_FEED_REFRESH_INTERVAL': 300,
+    'GLOBAL_FEED_MAX_AGE': 60,
+    # Traffic weights of registered algorithm versions ('v1', 'content-only');
+    # users are assigned by a salted hash of their id
+    'ALGORITHM_VERSIONS': {'v1': 1.0},
+    'ALGORITHM_ASSIGNMENT_SALT': 'recommendations',
+    # Version -> share of requests also scored in shadow for comparison
+    'SHADOW_VERSIONS': {},
+    # Score shadows on a background pool, shedding work past SHADOW_MAX_PENDING
+    'SHADOW_ASYNC': True,
+    'SHADOW_MAX_PENDING': 8,
+    # Raw UserBehavior older than this is rolled into the daily aggregates
+    'BEHAVIOR_RETENTION_DAYS': 90,
+    # Actions kept raw forever; purchases exclude already-bought artworks
+    'BEHAVIOR_RETENTION_KEEP_ACTIONS': ['purchase'],
+}
+
+
+def get_setting(name):
+    """Return a recommendation setting, falling back to its default"""
+    return getattr(settings, 'RECOMMENDATIONS', {}).get(name, DEFAULTS[name])
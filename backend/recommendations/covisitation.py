@@ -0,0 +1,183 @@
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.core.cache import caches
+from django.utils import timezone
+
+from .models import UserBehavior
+from .refresh import BackgroundRefresher
+
+
+class TopKCounter:
+    """Space-Saving counter: approximate counts for the heaviest keys in fixed memory
+
+    Holds at most capacity keys. A new key arriving when full replaces the
+    smallest one and inherits its count, so a count can overestimate by at
+    most the evicted minimum but any key whose true count exceeds
+    total / capacity is guaranteed to be kept (Metwally et al. 2005).
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.counts = {}
+
+    def add(self, key, weight: float = 1.0):
+        if key in self.counts or len(self.counts) < self.capacity:
+            self.counts[key] = self.counts.get(key, 0.0) + weight
+            return
+        smallest = min(self.counts, key=self.counts.get)
+        floor = self.counts.pop(smallest)
+        self.counts[key] = floor + weight
+
+    def most_common(self, n: Optional[int] = None) -> List[Tuple[object, float]]:
+        ranked = sorted(self.counts.items(), key=lambda item: -item[1])
+        return ranked if n is None else ranked[:n]
+
+    def __len__(self):
+        return len(self.counts)
+
+
+class CoVisitationIndex:
+    """Artworks viewed close together within the same session
+
+    Every view is paired with the previous session_length views of its
+    session, in both directions, and the pair counts are kept in a bounded
+    TopKCounter per artwork. Recent views of live sessions are kept in the
+    shared cache, so any worker can pair the next view without a query: each
+    view takes the next position from an atomic per-session counter and is
+    written to its own slot of a session_length ring, so concurrent requests
+    in one session never overwrite each other's views. A background thread rebuilds the whole index from the last `days` of
+    views every refresh_interval, which also picks up pairs counted by
+    other workers, and swaps it in; scoring never waits on a rebuild.
+    """
+
+    def __init__(self, days: int = 7, neighbours: int = 50, session_length: int = 20,
+                 session_ttl: float = 1800, refresh_interval: int = 3600, cache_alias: str = 'default'):
+        self.days = days
+        self.neighbours = neighbours
+        self.session_length = session_length
+        self.session_ttl = session_ttl
+        self.refresh_interval = refresh_interval
+        self.cache_alias = cache_alias
+        self._lock = threading.RLock()
+        self._built_at = None
+        self._counters = {}
+        self._refresher = BackgroundRefresher(self.rebuild, refresh_interval, name='covisitation-refresher')
+
+    def _session_key(self, session_id: str) -> str:
+        return f'covisitation:session:{session_id}'
+
+    def _slot_key(self, session_id: str, position: int) -> str:
+        return f'covisitation:session:{session_id}:{position % self.session_length}'
+
+    def _next_position(self, cache, session_id: str) -> int:
+        key = self._session_key(session_id)
+        cache.add(key, 0, self.session_ttl)
+        try:
+            position = cache.incr(key)
+        except ValueError:
+            # The counter expired between add() and incr(): start a new ring
+            cache.set(key, 1, self.session_ttl)
+            return 1
+        cache.touch(key, self.session_ttl)
+        return position
+
+    def _views(self, cache, session_id: str, last_position: int) -> List[int]:
+        """Artworks in the ring up to last_position, oldest first, each at its latest view"""
+        positions = range(max(1, last_position - self.session_length + 1), last_position + 1)
+        slots = cache.get_many([self._slot_key(session_id, position) for position in positions])
+        views = []
+        for position in positions:
+            slot = slots.get(self._slot_key(session_id, position))
+            # A slot still holding an older lap of the ring has been overwritten or is missing
+            if slot is not None and slot[0] == position:
+                views.append(slot[1])
+
+        seen = set()
+        latest = []
+        for artwork_id in reversed(views):
+            if artwork_id not in seen:
+                seen.add(artwork_id)
+                latest.append(artwork_id)
+        latest.reverse()
+        return latest
+
+    def _pair(self, counters: Dict[int, TopKCounter], recent: Iterable[int], artwork_id: int):
+        for other_id in recent:
+            if other_id == artwork_id:
+                continue
+            for source, target in ((artwork_id, other_id), (other_id, artwork_id)):
+                counter = counters.get(source)
+                if counter is None:
+                    counter = counters[source] = TopKCounter(self.neighbours)
+                counter.add(target)
+
+    def rebuild(self):
+        """Replay the view window session by session in a single query"""
+        counters = {}
+
+        rows = UserBehavior.objects.filter(
+            action_type='view',
+            session_id__isnull=False,
+            artwork_id__isnull=False,
+            timestamp__gte=timezone.now() - timedelta(days=self.days),
+        ).order_by('session_id', 'timestamp').values_list('session_id', 'artwork_id')
+
+        current_session = None
+        recent = deque(maxlen=self.session_length)
+        for session_id, artwork_id in rows.iterator(chunk_size=5000):
+            if session_id != current_session:
+                current_session = session_id
+                recent = deque(maxlen=self.session_length)
+            self._pair(counters, recent, artwork_id)
+            if artwork_id in recent:
+                recent.remove(artwork_id)
+            recent.append(artwork_id)
+
+        with self._lock:
+            self._counters = counters
+            self._built_at = time.monotonic()
+
+    def add_view(self, session_id: Optional[str], artwork_id: Optional[int]):
+        """Pair a newly tracked view with the session's recent views"""
+        if not session_id or not artwork_id:
+            return
+
+        cache = caches[self.cache_alias]
+        position = self._next_position(cache, session_id)
+        recent = [other_id for other_id in self._views(cache, session_id, position - 1)
+                  if other_id != artwork_id]
+        with self._lock:
+            if self._built_at is not None:
+                self._pair(self._counters, recent, artwork_id)
+        cache.set(self._slot_key(session_id, position), (position, artwork_id), self.session_ttl)
+
+    def recent_views(self, session_id: str) -> List[int]:
+        """Artworks viewed in this session on any worker, most recent last"""
+        cache = caches[self.cache_alias]
+        return self._views(cache, session_id, cache.get(self._session_key(session_id)) or 0)
+
+    def score(self, recent_artwork_ids: List[int], limit: int) -> List[Tuple[int, float]]:
+        """Rank co-visited artworks for a session, weighting its latest views highest
+
+        Empty until the background thread has built the index once.
+        """
+        self._refresher.ensure_started(built=self._built_at is not None)
+
+        scores = defaultdict(float)
+        viewed = set(recent_artwork_ids)
+        with self._lock:
+            for position, artwork_id in enumerate(reversed(recent_artwork_ids[-self.session_length:])):
+                counter = self._counters.get(artwork_id)
+                if counter is None:
+                    continue
+                total = sum(counter.counts.values())
+                for other_id, count in counter.counts.items():
+                    if other_id not in viewed:
+                        scores[other_id] += count / total / (position + 1)
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:limit]
@@ -0,0 +1,214 @@
+import logging
+import os
+import threading
+import time
+import zipfile
+from datetime import timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import UserBehavior
+
+logger = logging.getLogger(__name__)
+
+# Implicit feedback strength per action; other actions carry no item signal
+ACTION_WEIGHTS = {
+    'view': 1.0,
+    'cart_add': 2.0,
+    'like': 4.0,
+    'purchase': 8.0,
+}
+
+LATEST_POINTER = 'LATEST'
+
+
+def load_interactions(days: Optional[int] = None):
+    """Return user ids, artwork ids and summed action weights as parallel arrays"""
+    behaviors = UserBehavior.objects.filter(
+        action_type__in=list(ACTION_WEIGHTS),
+        artwork_id__isnull=False,
+    )
+    if days:
+        behaviors = behaviors.filter(timestamp__gte=timezone.now() - timedelta(days=days))
+
+    strengths = {}
+    rows = behaviors.order_by().values('user_id', 'artwork_id', 'action_type').annotate(
+        count=Count('id')
+    ).values_list('user_id', 'artwork_id', 'action_type', 'count')
+    for user_id, artwork_id, action_type, count in rows.iterator(chunk_size=5000):
+        key = (user_id, artwork_id)
+        strengths[key] = strengths.get(key, 0.0) + ACTION_WEIGHTS[action_type] * count
+
+    if not strengths:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+    pairs = np.array(list(strengths), dtype=np.int64)
+    values = np.fromiter(strengths.values(), dtype=np.float32, count=len(strengths))
+    return pairs[:, 0], pairs[:, 1], values
+
+
+def _compress(row_index: np.ndarray, col_index: np.ndarray, values: np.ndarray, n_rows: int):
+    """Group entries by row, returning CSR style (indptr, cols, values)"""
+    order = np.argsort(row_index, kind='stable')
+    indptr = np.zeros(n_rows + 1, dtype=np.int64)
+    np.cumsum(np.bincount(row_index, minlength=n_rows), out=indptr[1:])
+    return indptr, col_index[order], values[order]
+
+
+def _least_squares_step(fixed: np.ndarray, indptr, cols, confidence, regularization: float) -> np.ndarray:
+    """Solve every row's factors against the fixed side (Hu, Koren & Volinsky 2008)"""
+    n_factors = fixed.shape[1]
+    gram = fixed.T @ fixed
+    ridge = regularization * np.eye(n_factors)
+    solved = np.zeros((len(indptr) - 1, n_factors), dtype=np.float64)
+
+    for row in range(len(indptr) - 1):
+        start, end = indptr[row], indptr[row + 1]
+        if start == end:
+            continue
+        observed = fixed[cols[start:end]]
+        row_confidence = confidence[start:end]
+        # Only observed entries differ from the shared gram matrix
+        a = gram + (observed.T * (row_confidence - 1.0)) @ observed + ridge
+        b = observed.T @ row_confidence
+        solved[row] = np.linalg.solve(a, b)
+
+    return solved
+
+
+def train_als(user_ids: np.ndarray, artwork_ids: np.ndarray, strengths: np.ndarray,
+              factors: int = 32, regularization: float = 0.1, alpha: float = 2.0,
+              iterations: int = 10, seed: int = 0) -> Dict[str, np.ndarray]:
+    """Fit implicit-feedback ALS and return ids with their factor arrays
+
+    Each user's interacted item indices are returned too, CSR style, so
+    recommend() can leave out artworks the user has already seen.
+    """
+    unique_users, user_index = np.unique(user_ids, return_inverse=True)
+    unique_items, item_index = np.unique(artwork_ids, return_inverse=True)
+    confidence = 1.0 + alpha * strengths.astype(np.float64)
+
+    by_user = _compress(user_index, item_index, confidence, len(unique_users))
+    by_item = _compress(item_index, user_index, confidence, len(unique_items))
+
+    rng = np.random.default_rng(seed)
+    user_factors = rng.normal(scale=0.01, size=(len(unique_users), factors))
+    item_factors = rng.normal(scale=0.01, size=(len(unique_items), factors))
+
+    for _ in range(iterations):
+        user_factors = _least_squares_step(item_factors, *by_user, regularization)
+        item_factors = _least_squares_step(user_factors, *by_item, regularization)
+
+    return {
+        'user_ids': unique_users,
+        'artwork_ids': unique_items,
+        'user_factors': user_factors.astype(np.float32),
+        'item_factors': item_factors.astype(np.float32),
+        'seen_indptr': by_user[0],
+        'seen_items': by_user[1].astype(np.int32),
+    }
+
+
+def save_model(directory, model: Dict[str, np.ndarray], keep: int = 3) -> str:
+    """Write a versioned artifact, point LATEST at it and prune old versions"""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    version = timezone.now().strftime('als-%Y%m%d%H%M%S')
+    np.savez(directory / f'{version}.npz', **model)
+
+    # Swap the pointer atomically so readers never see a partial write
+    pointer = directory / f'{LATEST_POINTER}.tmp'
+    pointer.write_text(version)
+    os.replace(pointer, directory / LATEST_POINTER)
+
+    artifacts = sorted(directory.glob('als-*.npz'))
+    for stale in artifacts[:-keep] if keep else []:
+        stale.unlink()
+
+    return version
+
+
+class FactorModel:
+    """Trained user and item factors, scored with one matrix-vector product"""
+
+    def __init__(self, version: str, arrays):
+        self.version = version
+        self.item_ids = arrays['artwork_ids']
+        self.item_factors = arrays['item_factors']
+        self.user_factors = arrays['user_factors']
+        self.user_row = {int(user_id): row for row, user_id in enumerate(arrays['user_ids'])}
+        # Artifacts trained before interactions were stored have nothing to exclude
+        if 'seen_indptr' in arrays:
+            self.seen_indptr = arrays['seen_indptr']
+            self.seen_items = arrays['seen_items']
+        else:
+            self.seen_indptr = None
+            self.seen_items = None
+
+    def seen(self, row: int) -> np.ndarray:
+        """Item indices this user interacted with in the training data"""
+        if self.seen_indptr is None:
+            return np.zeros(0, dtype=np.int32)
+        return self.seen_items[self.seen_indptr[row]:self.seen_indptr[row + 1]]
+
+    def recommend(self, user_id: int, limit: int) -> List[Tuple[int, float]]:
+        """Return (artwork_id, predicted preference) pairs for unseen artworks, best first"""
+        row = self.user_row.get(user_id)
+        if row is None or limit <= 0:
+            return []
+
+        scores = self.item_factors @ self.user_factors[row]
+        # ALS scores the user's own interactions highest; they are not recommendations
+        seen = self.seen(row)
+        scores[seen] = -np.inf
+        limit = min(limit, len(scores) - len(np.unique(seen)))
+        if limit <= 0:
+            return []
+        if len(scores) > limit:
+            top = np.argpartition(-scores, limit - 1)[:limit]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [(int(self.item_ids[i]), float(scores[i])) for i in top]
+
+
+class FactorModelStore:
+    """Loads the LATEST model artifact and reloads it when a new one is published"""
+
+    def __init__(self, directory, check_interval: float = 60):
+        self.directory = Path(directory)
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._model = None
+        self._checked_at = None
+
+    def get(self) -> Optional[FactorModel]:
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < self.check_interval:
+            return self._model
+
+        with self._lock:
+            self._checked_at = now
+            try:
+                version = (self.directory / LATEST_POINTER).read_text().strip()
+            except FileNotFoundError:
+                self._model = None
+                return None
+
+            if self._model is None or self._model.version != version:
+                try:
+                    with np.load(self.directory / f'{version}.npz') as arrays:
+                        self._model = FactorModel(version, arrays)
+                except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+                    # A missing or pruned artifact must not fail requests
+                    logger.exception(
+                        'Could not load factor model %s, keeping %s', version,
+                        self._model.version if self._model else 'no model',
+                    )
+
+        return self._model
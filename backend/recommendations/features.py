@@ -0,0 +1,285 @@
+import math
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from artworks.models import Artwork
+
+from .conf import get_setting
+from .refresh import BackgroundRefresher
+
+PRICE_RANGES = ('low', 'medium', 'high')
+
+# Upper bounds (exclusive) for the low and medium price ranges
+PRICE_RANGE_BOUNDS = (5000, 15000)
+
+# Attributes rebuild() swaps in from its staging matrix
+_MATRIX_STATE = ('_columns', '_size', '_features', '_artist_ids', '_popularity', '_artwork_ids', '_metadata', '_row_of')
+
+# Content score weights, kept from the original per-artwork scoring
+CATEGORY_WEIGHT = 40
+PRICE_RANGE_WEIGHT = 30
+ARTIST_WEIGHT = 20
+MAX_POPULARITY_SCORE = 15
+SCORE_THRESHOLD = 50
+MAX_MATCH_SCORE = 95
+
+
+def price_range_for(price) -> str:
+    """Map a price onto the low/medium/high ranges used in UserBehavior"""
+    price = float(price)
+    if price < PRICE_RANGE_BOUNDS[0]:
+        return 'low'
+    if price < PRICE_RANGE_BOUNDS[1]:
+        return 'medium'
+    return 'high'
+
+
+def artwork_metadata(artwork: Artwork, artist_name: str) -> Dict[str, Any]:
+    """Display fields for one artwork, as attached to recommendations"""
+    return {
+        'artwork_id': artwork.id,
+        'title': artwork.title,
+        'artist_id': artwork.artist_id,
+        'artist_name': artist_name,
+        'category': artwork.category,
+        'price': float(artwork.price),
+        'price_range': price_range_for(artwork.price),
+        'image_url': artwork.image.url if artwork.image else None,
+    }
+
+
+def popularity_for(views: int, likes: int) -> float:
+    """Raw popularity before normalization; likes count more than views"""
+    return math.log1p(views + 3 * likes)
+
+
+class ArtworkFeatureMatrix:
+    """Feature matrix over active artworks for vectorized content scoring
+
+    Each row is an artwork: category one-hot and price range one-hot columns,
+    with artist ids and raw popularity held alongside. Scoring a user is one
+    matrix-vector product plus an artist match, and the top rows are picked
+    with argpartition. Rows are updated in place as artworks change. The
+    first score in a worker builds the matrix; after that a background
+    thread rebuilds it every max_age seconds, so changes saved by other
+    workers show up, and swaps it in, replaying changes made while the
+    rebuild was reading.
+    """
+
+    def __init__(self, max_age: float = 600):
+        self.max_age = max_age
+        self._lock = threading.RLock()
+        self._built_at = None
+        # (method, args) changes made while a rebuild runs, or None when none is running
+        self._replay = None
+        self._size = 0
+        self._columns = {}
+        self._features = np.zeros((0, 0), dtype=np.float32)
+        self._artist_ids = np.zeros(0, dtype=np.int64)
+        self._popularity = np.zeros(0, dtype=np.float32)
+        self._artwork_ids = np.zeros(0, dtype=np.int64)
+        self._metadata = []
+        self._row_of = {}
+        self._refresher = BackgroundRefresher(self.rebuild, max_age, name='artwork-feature-refresher')
+
+    def rebuild(self):
+        """Load every active artwork in a single query"""
+        with self._lock:
+            if self._replay is None:
+                self._replay = []
+
+        artworks = list(
+            Artwork.objects.filter(status='active').select_related('artist').only(
+                'id', 'title', 'category', 'price', 'image', 'views', 'likes',
+                'artist__username', 'artist__first_name', 'artist__last_name',
+            )
+        )
+
+        categories = {code for code, label in Artwork.CATEGORY_CHOICES}
+        categories.update(artwork.category for artwork in artworks)
+        columns = {category: index for index, category in enumerate(sorted(categories))}
+        for price_range in PRICE_RANGES:
+            columns[f'price:{price_range}'] = len(columns)
+
+        # Fill a separate matrix so scoring is not blocked while rows are written
+        staging = ArtworkFeatureMatrix(self.max_age)
+        staging._columns = columns
+        staging._allocate(max(len(artworks), 16))
+        for artwork in artworks:
+            staging._write_row(artwork, artwork.artist.full_name)
+
+        with self._lock:
+            for name in _MATRIX_STATE:
+                setattr(self, name, getattr(staging, name))
+            # Changes made since the query above may be missing from its rows
+            replay, self._replay = self._replay or [], None
+            for apply, args in replay:
+                apply(*args)
+            self._built_at = time.monotonic()
+
+    def _change(self, apply, *args):
+        with self._lock:
+            if self._replay is not None:
+                self._replay.append((apply, args))
+            # Before the first build there is nothing to change; it reads the database itself
+            if self._built_at is not None:
+                apply(*args)
+
+    def _allocate(self, capacity: int):
+        self._features = np.zeros((capacity, len(self._columns)), dtype=np.float32)
+        self._artist_ids = np.zeros(capacity, dtype=np.int64)
+        self._popularity = np.zeros(capacity, dtype=np.float32)
+        self._artwork_ids = np.zeros(capacity, dtype=np.int64)
+
+    def _grow(self):
+        capacity = max(self._features.shape[0] * 2, 16)
+        self._features = np.resize(self._features, (capacity, len(self._columns)))
+        self._artist_ids = np.resize(self._artist_ids, capacity)
+        self._popularity = np.resize(self._popularity, capacity)
+        self._artwork_ids = np.resize(self._artwork_ids, capacity)
+
+    def _write_row(self, artwork: Artwork, artist_name: str):
+        row = self._row_of.get(artwork.id)
+        if row is None:
+            if self._size == self._features.shape[0]:
+                self._grow()
+            row = self._size
+            self._size += 1
+            self._row_of[artwork.id] = row
+            self._metadata.append(None)
+
+        price_range = price_range_for(artwork.price)
+        self._features[row] = 0
+        self._features[row, self._columns[artwork.category]] = 1
+        self._features[row, self._columns[f'price:{price_range}']] = 1
+        self._artist_ids[row] = artwork.artist_id
+        self._popularity[row] = popularity_for(artwork.views, artwork.likes)
+        self._artwork_ids[row] = artwork.id
+        self._metadata[row] = artwork_metadata(artwork, artist_name)
+
+    def update_counters(self, counts: Dict[int, Dict[str, int]]):
+        """Refresh popularity from flushed view and like totals"""
+        self._change(self._apply_counters, counts)
+
+    def _apply_counters(self, counts: Dict[int, Dict[str, int]]):
+        for artwork_id, totals in counts.items():
+            row = self._row_of.get(artwork_id)
+            if row is not None:
+                self._popularity[row] = popularity_for(totals['views'], totals['likes'])
+
+    def _remove_row(self, artwork_id: int):
+        row = self._row_of.pop(artwork_id, None)
+        if row is None:
+            return
+
+        # Move the last row into the gap to keep the arrays dense
+        last = self._size - 1
+        if row != last:
+            self._features[row] = self._features[last]
+            self._artist_ids[row] = self._artist_ids[last]
+            self._popularity[row] = self._popularity[last]
+            self._artwork_ids[row] = self._artwork_ids[last]
+            self._metadata[row] = self._metadata[last]
+            self._row_of[int(self._artwork_ids[row])] = row
+        self._metadata.pop()
+        self._size -= 1
+
+    def update(self, artwork: Artwork, update_fields: Optional[frozenset] = None):
+        """Reflect a saved artwork: add, refresh or drop its row"""
+        self._change(self._apply_update, artwork, update_fields)
+
+    def _apply_update(self, artwork: Artwork, update_fields: Optional[frozenset]):
+        if artwork.status != 'active':
+            self._remove_row(artwork.id)
+            return
+
+        row = self._row_of.get(artwork.id)
+        if row is not None and update_fields and set(update_fields) <= {'views', 'likes'}:
+            # Counter bumps only move popularity
+            self._popularity[row] = popularity_for(artwork.views, artwork.likes)
+            return
+
+        if artwork.category not in self._columns:
+            # A new category needs a new column, which only a rebuild adds
+            self._refresher.request()
+            return
+
+        metadata = self._metadata[row] if row is not None else None
+        if metadata is not None and metadata['artist_id'] == artwork.artist_id:
+            artist_name = metadata['artist_name']
+        else:
+            artist_name = artwork.artist.full_name
+        self._write_row(artwork, artist_name)
+
+    def remove(self, artwork_id: int):
+        self._change(self._remove_row, artwork_id)
+
+    def _ensure_fresh(self):
+        self._refresher.ensure_built(lambda: self._built_at is not None)
+
+    def score(self, preferred_categories: List[str], preferred_price_range: str,
+              preferred_artists: List[int], limit: int) -> List[Dict[str, Any]]:
+        """Score every active artwork for one user and return the top matches"""
+        self._ensure_fresh()
+
+        with self._lock:
+            size = self._size
+            if size == 0 or limit <= 0:
+                return []
+
+            weights = np.zeros(len(self._columns), dtype=np.float32)
+            for category in preferred_categories:
+                column = self._columns.get(category)
+                if column is not None:
+                    weights[column] = CATEGORY_WEIGHT
+            price_column = self._columns.get(f'price:{preferred_price_range}')
+            if price_column is not None:
+                weights[price_column] = PRICE_RANGE_WEIGHT
+
+            popularity = self._popularity[:size]
+            max_popularity = popularity.max()
+            if max_popularity > 0:
+                popularity = popularity * (MAX_POPULARITY_SCORE / max_popularity)
+
+            scores = self._features[:size] @ weights + popularity
+            if preferred_artists:
+                scores += ARTIST_WEIGHT * np.isin(self._artist_ids[:size], preferred_artists)
+
+            candidates = np.flatnonzero(scores > SCORE_THRESHOLD)
+            if len(candidates) > limit:
+                top = np.argpartition(-scores[candidates], limit - 1)[:limit]
+                candidates = candidates[top]
+            candidates = candidates[np.argsort(-scores[candidates], kind='stable')]
+
+            matches = [(self._metadata[row], float(scores[row])) for row in candidates]
+
+        recommendations = []
+        for metadata, score in matches:
+            reasons = []
+            if metadata['category'] in preferred_categories:
+                reasons.append(f"Similar to your interest in {metadata['category']}")
+            if metadata['price_range'] == preferred_price_range:
+                reasons.append("Matches your preferred price range")
+            if metadata['artist_id'] in preferred_artists:
+                reasons.append("From artists you like")
+
+            recommendations.append({
+                'artwork_id': metadata['artwork_id'],
+                'title': metadata['title'],
+                'artist_name': metadata['artist_name'],
+                'category': metadata['category'],
+                'price': metadata['price'],
+                'image_url': metadata['image_url'],
+                'match_score': round(min(score, MAX_MATCH_SCORE), 1),
+                'reasons': reasons[:3],
+                'algorithm': 'content-based'
+            })
+
+        return recommendations
+
+
+# Shared by the engine and the Artwork signal handlers
+artwork_features = ArtworkFeatureMatrix(max_age=get_setting('FEATURE_MATRIX_MAX_AGE'))
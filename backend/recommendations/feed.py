@@ -0,0 +1,120 @@
+import hashlib
+import json
+import threading
+from collections import defaultdict
+from typing import Any, Dict, Optional, Tuple
+
+from django.utils import timezone
+
+from artworks.models import Artwork
+
+from .features import artwork_metadata
+from .hydration import HYDRATED_FIELDS
+from .popularity import top_popular
+from .refresh import BackgroundRefresher
+
+# Blank category key for the feed across every category
+ALL_CATEGORIES = ''
+
+FEED_ALGORITHM_VERSION = 'global-v1'
+
+
+class GlobalFeed:
+    """Popular-artwork feed for anonymous visitors, held pre-serialized in memory
+
+    The first request in a worker builds the feed once (concurrent first
+    requests wait for that build); after that a BackgroundRefresher rebuilds
+    it every refresh_interval seconds from the popularity table, topped up with featured and most liked artworks, for
+    all categories and for each one. Requests are answered from JSON bytes
+    serialized once per (category, limit) with a strong ETag over the
+    content, so serving the feed never touches the database and unchanged
+    feeds keep their ETag across rebuilds.
+    """
+
+    def __init__(self, size: int = 48, refresh_interval: float = 300):
+        self.size = size
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._feeds = None
+        self._payloads = {}
+        self._generated_at = None
+        self._refresher = BackgroundRefresher(self.build, refresh_interval, name='global-feed-refresher')
+
+    def _entry(self, artwork: Artwork, reason: str, match_score: int) -> Dict[str, Any]:
+        metadata = artwork_metadata(artwork, artwork.artist.full_name)
+        return {
+            'artwork_id': artwork.id,
+            **{field: metadata[field] for field in HYDRATED_FIELDS},
+            'match_score': match_score,
+            'reasons': [reason],
+            'algorithm': 'popularity',
+        }
+
+    def _active_artworks(self):
+        return Artwork.objects.filter(status='active').select_related('artist').only(
+            'id', 'title', 'category', 'price', 'image',
+            'artist__username', 'artist__first_name', 'artist__last_name',
+        )
+
+    def build(self):
+        """Recompute every feed from the database and drop the serialized payloads"""
+        popular_ids = [artwork_id for artwork_id, _ in top_popular(self.size * 4)]
+        artworks = self._active_artworks().in_bulk(popular_ids)
+        popular = [artworks[artwork_id] for artwork_id in popular_ids if artwork_id in artworks]
+
+        feeds = defaultdict(list)
+        for artwork in popular:
+            entry = self._entry(artwork, 'Popular choice among buyers', 60)
+            feeds[ALL_CATEGORIES].append(entry)
+            feeds[artwork.category].append(entry)
+
+        # Top up thin feeds with featured and most liked artworks
+        fill_order = ('-is_featured', '-likes', '-views', '-created_at')
+        for category in [ALL_CATEGORIES] + [code for code, label in Artwork.CATEGORY_CHOICES]:
+            feed = feeds[category][:self.size]
+            missing = self.size - len(feed)
+            if missing > 0:
+                fill = self._active_artworks().exclude(id__in=[entry['artwork_id'] for entry in feed])
+                if category:
+                    fill = fill.filter(category=category)
+                feed.extend(
+                    self._entry(artwork, 'Highly rated on Artist Alley', 50)
+                    for artwork in fill.order_by(*fill_order)[:missing]
+                )
+            feeds[category] = feed
+
+        with self._lock:
+            self._feeds = dict(feeds)
+            self._payloads = {}
+            self._generated_at = timezone.now().isoformat()
+
+    def payload(self, category: Optional[str] = None, limit: int = 12) -> Tuple[bytes, str]:
+        """Serialized feed and its strong ETag for one category and limit"""
+        self._refresher.ensure_built(lambda: self._feeds is not None)
+        limit = max(0, min(limit, self.size))
+        key = (category or ALL_CATEGORIES, limit)
+
+        with self._lock:
+            if key[0] not in self._feeds:
+                # Unknown categories share one empty payload so they cannot grow the cache
+                key = (None, 0)
+            cached = self._payloads.get(key)
+            if cached is not None:
+                return cached
+            recommendations = self._feeds.get(key[0], [])[:limit]
+            body = json.dumps({
+                'success': True,
+                'recommendations': recommendations,
+                'algorithm_version': FEED_ALGORITHM_VERSION,
+                'total_count': len(recommendations),
+            }).encode()
+            cached = self._payloads[key] = (body, f'"{hashlib.sha256(body).hexdigest()[:32]}"')
+            return cached
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'generated_at': self._generated_at,
+                'categories': len(self._feeds or {}),
+                'serialized_payloads': len(self._payloads),
+            }
@@ -0,0 +1,79 @@
+from typing import Any, Dict, List
+
+from artworks.models import Artwork
+
+from .cache import LRUCache, TierStats
+from .conf import get_setting
+from .features import artwork_metadata
+
+# Metadata copied onto every hydrated recommendation
+HYDRATED_FIELDS = ('title', 'artist_name', 'category', 'price', 'image_url')
+
+# Cached for ids that no longer resolve to an artwork, so they are not re-queried
+_MISSING = {'status': None}
+
+
+class ArtworkHydrator:
+    """Attach artwork metadata to recommendation candidates in one query
+
+    Candidates from every source arrive as dicts with at least an
+    artwork_id. Ids not in the per-worker LRU are loaded together with a
+    single id__in query, and candidates whose artwork is missing or not
+    active are dropped, so ranking and business rules only see artworks
+    that can actually be shown and sold.
+    """
+
+    def __init__(self, max_entries: int = 5000, ttl: float = 300):
+        self.cache = LRUCache(max_entries=max_entries, ttl=ttl)
+        self.cache_stats = TierStats()
+
+    def _load(self, artwork_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        artworks = Artwork.objects.filter(id__in=artwork_ids).select_related('artist').only(
+            'id', 'title', 'category', 'price', 'image', 'status',
+            'artist__username', 'artist__first_name', 'artist__last_name',
+        )
+        return {
+            artwork.id: {**artwork_metadata(artwork, artwork.artist.full_name), 'status': artwork.status}
+            for artwork in artworks
+        }
+
+    def hydrate(self, recommendations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Return the recommendations with metadata filled in, dropping unavailable artworks"""
+        metadata = {}
+        missing = []
+        for artwork_id in {rec['artwork_id'] for rec in recommendations}:
+            entry = self.cache.get(artwork_id)
+            self.cache_stats.record(entry is not None)
+            if entry is None:
+                missing.append(artwork_id)
+            else:
+                metadata[artwork_id] = entry
+
+        if missing:
+            loaded = self._load(missing)
+            for artwork_id in missing:
+                entry = loaded.get(artwork_id, _MISSING)
+                self.cache.set(artwork_id, entry)
+                metadata[artwork_id] = entry
+
+        hydrated = []
+        for rec in recommendations:
+            entry = metadata[rec['artwork_id']]
+            if entry['status'] != 'active':
+                continue
+            hydrated.append({**rec, **{field: entry[field] for field in HYDRATED_FIELDS}})
+
+        return hydrated
+
+    def invalidate(self, artwork_id: int):
+        self.cache.delete(artwork_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.cache_stats.as_dict(), 'entries': len(self.cache)}
+
+
+# Shared by the engine and the Artwork signal handlers
+artwork_hydrator = ArtworkHydrator(
+    max_entries=get_setting('HYDRATION_CACHE_MAX_ENTRIES'),
+    ttl=get_setting('HYDRATION_CACHE_TTL'),
+)
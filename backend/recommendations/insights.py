@@ -0,0 +1,104 @@
+import time
+from collections import Counter
+from datetime import timedelta
+from typing import Dict, Iterable, Tuple
+
+from django.core.cache import caches
+from django.core.cache.backends.memcached import PyLibMCCache, PyMemcacheCache
+from django.core.cache.backends.redis import RedisCache
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .cache import is_process_local
+from .models import UserBehavior
+
+# Backends whose incr is a single atomic server-side operation
+ATOMIC_INCR_BACKENDS = (RedisCache, PyMemcacheCache, PyLibMCCache)
+
+# Insight name for each action counted on the dashboard
+INSIGHT_ACTIONS = {
+    'view': 'total_views',
+    'like': 'total_likes',
+    'purchase': 'total_purchases',
+}
+
+
+class BehaviorInsights:
+    """Per-user dashboard counts over the behavior window, cached and kept current
+
+    A miss is filled with one conditional aggregation over the window.
+    On Redis or Memcached newly tracked events increment the cached counts
+    in place, so the dashboard stays current without recounting. Other
+    shared backends implement incr as a get and a set that concurrent
+    workers can interleave, so there every event deletes the cached counts
+    and the next read aggregates again; a warm read still costs the cache
+    lookup, which on DatabaseCache is a query. A process-local cache would
+    only ever see this worker's events, so counts are not cached at all.
+    Counts do not shrink as events age out, so entries expire after ttl and
+    are recomputed, which bounds that drift.
+    """
+
+    key_prefix = 'recommendations:insights'
+
+    def __init__(self, window: timedelta = timedelta(days=30), ttl: timedelta = timedelta(hours=1),
+                 cache_alias: str = 'default'):
+        self.window = window
+        self.ttl = ttl
+        self.cache_alias = cache_alias
+
+    @property
+    def shared(self):
+        return caches[self.cache_alias]
+
+    def epoch(self) -> int:
+        """Changes every ttl, as long as counts may lag events ageing out of the window"""
+        return int(time.time() // self.ttl.total_seconds())
+
+    def _keys(self, user_id: int) -> Dict[str, str]:
+        return {name: f'{self.key_prefix}:{user_id}:{name}' for name in INSIGHT_ACTIONS.values()}
+
+    def _aggregate(self, user_id: int) -> Dict[str, int]:
+        return UserBehavior.objects.filter(
+            user_id=user_id,
+            timestamp__gte=timezone.now() - self.window
+        ).aggregate(**{
+            name: Count('id', filter=Q(action_type=action_type))
+            for action_type, name in INSIGHT_ACTIONS.items()
+        })
+
+    def get(self, user_id: int) -> Dict[str, int]:
+        if is_process_local(self.shared):
+            return self._aggregate(user_id)
+
+        keys = self._keys(user_id)
+        cached = self.shared.get_many(list(keys.values()))
+        if len(cached) == len(keys):
+            return {name: cached[key] for name, key in keys.items()}
+
+        counts = self._aggregate(user_id)
+        self.shared.set_many({keys[name]: count for name, count in counts.items()},
+                             timeout=int(self.ttl.total_seconds()))
+        return counts
+
+    def record(self, events: Iterable[Tuple[int, str]]):
+        """Add (user_id, action_type) events to any cached counts"""
+        shared = self.shared
+        if is_process_local(shared):
+            return
+
+        increments = Counter(
+            (user_id, INSIGHT_ACTIONS[action_type])
+            for user_id, action_type in events
+            if action_type in INSIGHT_ACTIONS
+        )
+        if not isinstance(shared, ATOMIC_INCR_BACKENDS):
+            # Recount on the next read rather than race other workers' updates
+            shared.delete_many([self._keys(user_id)[name] for user_id, name in increments])
+            return
+
+        for (user_id, name), delta in increments.items():
+            try:
+                shared.incr(self._keys(user_id)[name], delta)
+            except ValueError:
+                # Not cached; the next read counts it from the database
+                pass
@@ -0,0 +1,98 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+from django.db import connection
+
+
+class QueryCounter:
+    """Database execute wrapper that counts queries without needing DEBUG"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Stage:
+    """Timing, query count and candidate counts for one pipeline stage"""
+
+    def __init__(self, name: str, candidates_in: Optional[int] = None):
+        self.name = name
+        self.candidates_in = candidates_in
+        self.candidates_out = None
+        self.duration_ms = 0.0
+        self.queries = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'stage': self.name,
+            'duration_ms': round(self.duration_ms, 3),
+            'queries': self.queries,
+            'candidates_in': self.candidates_in,
+            'candidates_out': self.candidates_out,
+        }
+
+
+class PipelineTrace:
+    """Ordered stages of one recommendation request"""
+
+    def __init__(self):
+        self.stages: List[Stage] = []
+
+    @contextmanager
+    def stage(self, name: str, candidates_in: Optional[int] = None):
+        """Time the block; set candidates_out on the yielded stage before leaving it"""
+        stage = Stage(name, candidates_in)
+        counter = QueryCounter()
+        started = time.perf_counter()
+        try:
+            with connection.execute_wrapper(counter):
+                yield stage
+        finally:
+            stage.duration_ms = (time.perf_counter() - started) * 1000
+            stage.queries = counter.count
+            self.stages.append(stage)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'total_ms': round(sum(stage.duration_ms for stage in self.stages), 3),
+            'total_queries': sum(stage.queries for stage in self.stages),
+            'stages': [stage.as_dict() for stage in self.stages],
+        }
+
+
+class PipelineMetrics:
+    """Running per-stage totals across requests, local to one worker"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages = {}
+
+    def record(self, trace: PipelineTrace):
+        with self._lock:
+            for stage in trace.stages:
+                totals = self._stages.setdefault(stage.name, {
+                    'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'queries': 0, 'candidates_out': 0,
+                })
+                totals['count'] += 1
+                totals['total_ms'] += stage.duration_ms
+                totals['max_ms'] = max(totals['max_ms'], stage.duration_ms)
+                totals['queries'] += stage.queries
+                totals['candidates_out'] += stage.candidates_out or 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                name: {
+                    'count': totals['count'],
+                    'mean_ms': round(totals['total_ms'] / totals['count'], 3),
+                    'max_ms': round(totals['max_ms'], 3),
+                    'mean_queries': round(totals['queries'] / totals['count'], 2),
+                    'mean_candidates_out': round(totals['candidates_out'] / totals['count'], 2),
+                }
+                for name, totals in self._stages.items()
+            }
@@ -0,0 +1,104 @@
+import heapq
+import math
+from collections import defaultdict
+from datetime import timedelta
+from typing import Dict, Optional
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ArtworkSimilarity, UserBehavior
+
+# Interaction strength per action; a user's strongest action on an item counts
+ITEM_SIMILARITY_WEIGHTS = {
+    'view': 1.0,
+    'like': 3.0,
+    'purchase': 5.0,
+}
+
+
+def _interactions_by_user(since=None):
+    """Yield (user_id, {artwork_id: weight}) streamed in user order"""
+    behaviors = UserBehavior.objects.filter(
+        action_type__in=list(ITEM_SIMILARITY_WEIGHTS),
+        artwork_id__isnull=False,
+    )
+    if since is not None:
+        behaviors = behaviors.filter(timestamp__gte=since)
+
+    rows = behaviors.order_by('user_id').values_list('user_id', 'artwork_id', 'action_type')
+
+    current_user = None
+    items = {}
+    for user_id, artwork_id, action_type in rows.iterator(chunk_size=5000):
+        if user_id != current_user:
+            if items:
+                yield current_user, items
+            current_user = user_id
+            items = {}
+        items[artwork_id] = max(items.get(artwork_id, 0.0), ITEM_SIMILARITY_WEIGHTS[action_type])
+    if items:
+        yield current_user, items
+
+
+def build_item_similarity(
+    days: Optional[int] = None,
+    neighbours: int = 20,
+    max_items_per_user: int = 200,
+    min_co_occurrences: int = 1,
+) -> Dict[str, int]:
+    """Rebuild ArtworkSimilarity with the top cosine neighbours of every artwork
+
+    Each artwork is a sparse vector over users, valued by the strongest
+    interaction. Co-occurrence counts and dot products are accumulated per
+    user, so the cost is the sum of squared per-user item counts. Very active
+    users are capped at their max_items_per_user strongest items.
+    """
+    since = timezone.now() - timedelta(days=days) if days else None
+
+    norms = defaultdict(float)
+    dots = defaultdict(lambda: defaultdict(float))
+    co_occurrences = defaultdict(lambda: defaultdict(int))
+    users = 0
+
+    for user_id, items in _interactions_by_user(since):
+        users += 1
+        if len(items) > max_items_per_user:
+            items = dict(heapq.nlargest(max_items_per_user, items.items(), key=lambda item: item[1]))
+
+        ranked = sorted(items.items())
+        for index, (artwork_id, weight) in enumerate(ranked):
+            norms[artwork_id] += weight * weight
+            for other_id, other_weight in ranked[index + 1:]:
+                dots[artwork_id][other_id] += weight * other_weight
+                co_occurrences[artwork_id][other_id] += 1
+
+    # Pairs were accumulated once with artwork_id < other_id; score both directions
+    candidates = defaultdict(list)
+    for artwork_id, row in dots.items():
+        for other_id, dot in row.items():
+            count = co_occurrences[artwork_id][other_id]
+            if count < min_co_occurrences:
+                continue
+            score = dot / math.sqrt(norms[artwork_id] * norms[other_id])
+            candidates[artwork_id].append((score, count, other_id))
+            candidates[other_id].append((score, count, artwork_id))
+
+    built_at = timezone.now()
+    rows = [
+        ArtworkSimilarity(
+            artwork_id=artwork_id,
+            neighbours=[
+                {'artwork_id': other_id, 'score': round(score, 4), 'co_occurrences': count}
+                for score, count, other_id in heapq.nlargest(neighbours, scored, key=lambda x: (x[0], x[1], -x[2]))
+            ],
+            built_at=built_at,
+        )
+        for artwork_id, scored in candidates.items()
+    ]
+
+    with transaction.atomic():
+        ArtworkSimilarity.objects.all().delete()
+        ArtworkSimilarity.objects.bulk_create(rows, batch_size=1000)
+
+    return {'users': users, 'artworks': len(rows)}
@@ -0,0 +1,312 @@
+import json
+import platform
+import shutil
+import subprocess
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from pathlib import Path
+
+import django
+import numpy as np
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from artworks.models import Artwork
+from recommendations.features import PRICE_RANGES, artwork_features, price_range_for
+from recommendations.models import UserBehavior
+from recommendations.services import RecommendationEngine
+from recommendations.similarity import MinHashUserIndex, UserSimilarityIndex
+
+User = get_user_model()
+
+# Share of each action in the synthetic event stream
+ACTION_MIX = {
+    'view': 0.70,
+    'like': 0.14,
+    'search': 0.05,
+    'cart_add': 0.05,
+    'purchase': 0.04,
+    'follow_artist': 0.02,
+}
+
+
+def zipf_probabilities(n: int, exponent: float) -> np.ndarray:
+    """Probability of each rank under a Zipf law, most popular first"""
+    weights = 1.0 / np.arange(1, n + 1) ** exponent
+    return weights / weights.sum()
+
+
+def summarize(durations, queries):
+    durations_ms = np.array(durations) * 1000
+    return {
+        'count': len(durations),
+        'mean_ms': round(float(durations_ms.mean()), 3),
+        'p50_ms': round(float(np.percentile(durations_ms, 50)), 3),
+        'p95_ms': round(float(np.percentile(durations_ms, 95)), 3),
+        'max_ms': round(float(durations_ms.max()), 3),
+        'queries_per_op': round(float(np.mean(queries)), 2),
+    }
+
+
+@contextmanager
+def explicit_timestamps():
+    """Let bulk_create keep the synthetic timestamps instead of auto_now_add"""
+    field = UserBehavior._meta.get_field('timestamp')
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the recommendation engine on a synthetic dataset in a throwaway SQLite database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=5000)
+        parser.add_argument('--artists', type=int, default=200)
+        parser.add_argument('--artworks', type=int, default=5000)
+        parser.add_argument('--events', type=int, default=1000000)
+        parser.add_argument('--days', type=int, default=60,
+                            help='Spread synthetic events over the last N days')
+        parser.add_argument('--zipf', type=float, default=1.1,
+                            help='Zipf exponent for artwork popularity and user activity')
+        parser.add_argument('--samples', type=int, default=200,
+                            help='Operations timed per benchmark')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--minhash-bands', type=int, default=24,
+                            help='LSH bands for the MinHash vs exact comparison')
+        parser.add_argument('--minhash-rows', type=int, default=3,
+                            help='Rows per LSH band for the MinHash vs exact comparison')
+        parser.add_argument('--database-path', default=None,
+                            help='SQLite file to build the dataset in (default: a temp file, deleted afterwards)')
+        parser.add_argument('--output', default='bench_recommendations.json',
+                            help='Where to write the JSON results')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('The benchmark runs against local SQLite; set DATABASE_URL=sqlite:///... to run it')
+
+        temp_dir = None if options['database_path'] else tempfile.mkdtemp()
+        database_path = options['database_path'] or str(Path(temp_dir) / 'bench.sqlite3')
+        connection.settings_dict['TEST'] = {**connection.settings_dict.get('TEST', {}), 'NAME': database_path}
+        original_name = connection.settings_dict['NAME']
+
+        self.stdout.write(f'Creating benchmark database at {database_path}...')
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False, keepdb=False)
+        try:
+            self.rng = np.random.default_rng(options['seed'])
+            dataset = self._generate(options)
+            results = self._run_benchmarks(options)
+            comparison = self._compare_similarity(options)
+        finally:
+            connection.creation.destroy_test_db(original_name, verbosity=0, keepdb=bool(options['database_path']))
+            if temp_dir:
+                shutil.rmtree(temp_dir, ignore_errors=True)
+
+        report = {
+            'meta': self._meta(options),
+            'dataset': dataset,
+            'results': results,
+            'similar_users_minhash_vs_exact': comparison,
+        }
+        Path(options['output']).write_text(json.dumps(report, indent=2))
+
+        for name, stats in results.items():
+            self.stdout.write(f"{name:32} mean {stats['mean_ms']:9.3f} ms  p95 {stats['p95_ms']:9.3f} ms  "
+                              f"{stats['queries_per_op']:7.2f} queries/op")
+        self.stdout.write(f"similar users exact {comparison['exact']['mean_ms']:.3f} ms, "
+                          f"minhash {comparison['minhash']['mean_ms']:.3f} ms, "
+                          f"recall@10 {comparison['recall_at_10']:.3f} "
+                          f"({comparison['mean_candidates']:.1f} candidates/lookup)")
+        self.stdout.write(self.style.SUCCESS(f"Wrote results to {options['output']}"))
+
+    def _meta(self, options):
+        try:
+            commit = subprocess.run(
+                ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, cwd=settings.BASE_DIR, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+
+        return {
+            'commit': commit,
+            'created_at': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'numpy': np.__version__,
+            'sqlite': connection.Database.sqlite_version,
+            'options': {key: value for key, value in options.items()
+                        if key in ('users', 'artists', 'artworks', 'events', 'days', 'zipf', 'samples', 'seed',
+                                   'minhash_bands', 'minhash_rows')},
+        }
+
+    def _generate(self, options):
+        started = time.perf_counter()
+        self.stdout.write('Generating users and artworks...')
+
+        User.objects.bulk_create([
+            User(username=f'bench{i}', email=f'bench{i}@example.com', password='!')
+            for i in range(options['users'])
+        ], batch_size=2000)
+        self.user_ids = np.array(User.objects.order_by('id').values_list('id', flat=True))
+        artist_ids = self.user_ids[:options['artists']]
+
+        categories = [code for code, label in Artwork.CATEGORY_CHOICES]
+        prices = np.round(self.rng.lognormal(mean=9, sigma=0.8, size=options['artworks']), 2)
+        popularity = self.rng.permutation(options['artworks'])
+        Artwork.objects.bulk_create([
+            Artwork(
+                artist_id=int(self.rng.choice(artist_ids)),
+                title=f'Benchmark artwork {i}',
+                category=categories[int(self.rng.integers(len(categories)))],
+                price=float(prices[i]),
+                status='active' if self.rng.random() < 0.9 else 'sold',
+                views=int(10000 / (popularity[i] + 1)),
+                likes=int(1000 / (popularity[i] + 1)),
+            )
+            for i in range(options['artworks'])
+        ], batch_size=2000)
+
+        artworks = list(Artwork.objects.order_by('id').values_list('id', 'artist_id', 'category', 'price'))
+        artwork_ranked = self.rng.permutation(len(artworks))
+        user_ranked = self.rng.permutation(len(self.user_ids))
+        artwork_p = zipf_probabilities(len(artworks), options['zipf'])
+        user_p = zipf_probabilities(len(self.user_ids), options['zipf'])
+        actions = list(ACTION_MIX)
+        action_p = np.array(list(ACTION_MIX.values()))
+
+        self.stdout.write(f"Generating {options['events']} behavior events...")
+        window = timedelta(days=options['days']).total_seconds()
+        now = timezone.now()
+        batch_size = 20000
+        with explicit_timestamps():
+            for start in range(0, options['events'], batch_size):
+                size = min(batch_size, options['events'] - start)
+                event_users = self.user_ids[user_ranked[self.rng.choice(len(self.user_ids), size, p=user_p)]]
+                event_artworks = artwork_ranked[self.rng.choice(len(artworks), size, p=artwork_p)]
+                event_actions = self.rng.choice(len(actions), size, p=action_p)
+                offsets = self.rng.random(size) * window
+
+                behaviors = []
+                for user_id, artwork_index, action_index, offset in zip(event_users, event_artworks, event_actions, offsets):
+                    artwork_id, artist_id, category, price = artworks[artwork_index]
+                    action_type = actions[action_index]
+                    behaviors.append(UserBehavior(
+                        user_id=int(user_id),
+                        action_type=action_type,
+                        artwork_id=None if action_type == 'search' else artwork_id,
+                        artist_id=artist_id,
+                        category=category,
+                        price_range=price_range_for(price),
+                        search_query=category.replace('-', ' ') if action_type == 'search' else None,
+                        session_id=f's{user_id}-{int(offset // 3600)}',
+                        timestamp=now - timedelta(seconds=float(offset)),
+                    ))
+                with transaction.atomic():
+                    UserBehavior.objects.bulk_create(behaviors, batch_size=5000)
+
+        return {
+            'users': len(self.user_ids),
+            'artworks': len(artworks),
+            'events': UserBehavior.objects.count(),
+            'generation_seconds': round(time.perf_counter() - started, 2),
+        }
+
+    def _time(self, operation, arguments):
+        durations = []
+        queries = []
+        for argument in arguments:
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                operation(argument)
+                durations.append(time.perf_counter() - started)
+            queries.append(len(captured.captured_queries))
+        return summarize(durations, queries)
+
+    def _run_benchmarks(self, options):
+        self.stdout.write('Running benchmarks...')
+        engine = RecommendationEngine()
+        sample = [int(user_id) for user_id in self.rng.choice(self.user_ids, options['samples'])]
+        results = {}
+
+        results['preference_rebuild'] = self._time(engine._rebuild_user_preferences, sample)
+
+        # The first lookup pays for building the neighbour index
+        results['find_similar_users_cold'] = self._time(
+            lambda user_id: (engine.similarity_index.rebuild(), engine._find_similar_users(user_id)), sample[:5]
+        )
+        results['find_similar_users_warm'] = self._time(engine._find_similar_users, sample)
+
+        # Built explicitly so the recommendation timings below score a full matrix
+        results['feature_matrix_rebuild'] = self._time(lambda user_id: artwork_features.rebuild(), sample[:5])
+
+        def cold_recommendations(user_id):
+            engine.recommendation_cache.invalidate(user_id)
+            engine.get_recommendations(user_id)
+
+        results['get_recommendations_cold'] = self._time(cold_recommendations, sample)
+        results['get_recommendations_warm'] = self._time(engine.get_recommendations, sample)
+
+        artwork_ids = list(Artwork.objects.values_list('id', flat=True)[:100])
+
+        def track_one(user_id):
+            engine.track_user_behavior(
+                user_id, 'like', artwork_id=int(self.rng.choice(artwork_ids)),
+                category='painting', price_range=PRICE_RANGES[1]
+            )
+
+        def track_batch(user_id):
+            engine.track_user_behaviors([
+                {'user_id': user_id, 'action_type': 'view', 'artwork_id': int(artwork_id), 'category': 'painting'}
+                for artwork_id in self.rng.choice(artwork_ids, 50)
+            ])
+
+        results['track_user_behavior'] = self._time(track_one, sample)
+        results['track_user_behaviors_batch50'] = self._time(track_batch, sample[:50])
+
+        return results
+
+    def _compare_similarity(self, options):
+        """Time MinHash/LSH lookups and measure how many exact top-k neighbours they find"""
+        self.stdout.write('Comparing MinHash/LSH with exact similar-user search...')
+        engine = RecommendationEngine()
+        exact = UserSimilarityIndex(window=engine.behavior_window)
+        approximate = MinHashUserIndex(
+            window=engine.behavior_window, bands=options['minhash_bands'], rows=options['minhash_rows']
+        )
+        exact.rebuild()
+        build_started = time.perf_counter()
+        approximate.rebuild()
+        build_seconds = time.perf_counter() - build_started
+
+        sample = [int(user_id) for user_id in self.rng.choice(self.user_ids, options['samples'])]
+        found = []
+        candidates = []
+        for user_id in sample:
+            exact_scores = exact.similar_users(user_id, threshold=0)
+            expected = exact_scores[:10]
+            if not expected or expected[0][1] <= 0.3:
+                continue
+            # Exact scores tie often, so any user scoring at least the 10th best counts as a hit
+            cutoff = expected[-1][1]
+            exact_score = dict(exact_scores)
+            matches = approximate.similar_users(user_id, threshold=0)
+            candidates.append(len(matches))
+            hits = sum(1 for other_id, _ in matches[:len(expected)] if exact_score.get(other_id, 0) >= cutoff)
+            found.append(hits / len(expected))
+
+        return {
+            'bands': options['minhash_bands'],
+            'rows': options['minhash_rows'],
+            'build_seconds': round(build_seconds, 3),
+            'exact': self._time(lambda user_id: exact.similar_users(user_id, threshold=0.3), sample),
+            'minhash': self._time(lambda user_id: approximate.similar_users(user_id, threshold=0.3), sample),
+            'recall_at_10': round(float(np.mean(found)), 4) if found else 0.0,
+            'mean_candidates': round(float(np.mean(candidates)), 1) if candidates else 0.0,
+        }
@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+from recommendations.item_similarity import build_item_similarity
+
+
+class Command(BaseCommand):
+    help = 'Build the item-item similarity index served by /api/recommendations/similar/<artwork_id>/'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None,
+                            help='Only use behavior from the last N days (default: all retained raw history)')
+        parser.add_argument('--neighbours', type=int, default=20,
+                            help='Neighbours kept per artwork')
+        parser.add_argument('--max-items-per-user', type=int, default=200,
+                            help="Cap on each user's strongest items when counting pairs")
+        parser.add_argument('--min-co-occurrences', type=int, default=1,
+                            help='Minimum number of users two artworks must share')
+
+    def handle(self, *args, **options):
+        self.stdout.write('Building artwork similarity index...')
+        started = time.perf_counter()
+
+        result = build_item_similarity(
+            days=options['days'],
+            neighbours=options['neighbours'],
+            max_items_per_user=options['max_items_per_user'],
+            min_co_occurrences=options['min_co_occurrences'],
+        )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Indexed {result['artworks']} artworks from {result['users']} users "
+                f"in {time.perf_counter() - started:.1f}s"
+            )
+        )
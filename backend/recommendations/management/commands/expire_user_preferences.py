@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from recommendations.services import RecommendationEngine
+
+
+class Command(BaseCommand):
+    help = 'Remove behavior that has left the 30-day window from user preference counters'
+
+    def handle(self, *args, **options):
+        self.stdout.write('Expiring user preference counters...')
+
+        expired = RecommendationEngine().expire_user_preferences()
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Expired counters for {expired} users')
+        )
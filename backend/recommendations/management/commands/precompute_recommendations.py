@@ -0,0 +1,158 @@
+import logging
+import multiprocessing
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models.functions import Mod
+from django.utils import timezone
+from recommendations.cache import is_process_local
+from recommendations.models import UserBehavior
+from recommendations.services import RecommendationEngine
+
+logger = logging.getLogger(__name__)
+
+# Failed user ids listed in the command output
+MAX_REPORTED_FAILURES = 20
+
+# One engine per worker process, created by _init_worker
+_engine = None
+
+
+def _init_worker():
+    global _engine
+    from django.apps import apps
+    if not apps.ready:
+        # Spawned (not forked) workers start without Django configured
+        import django
+        django.setup()
+    # Never share the parent's database connections across processes
+    connections.close_all()
+    _engine = RecommendationEngine()
+
+
+def _generate_chunk(args):
+    user_ids, limit = args
+    results = {}
+    failed_user_ids = []
+    for user_id in user_ids:
+        try:
+            results[user_id] = _engine.generate_recommendations(user_id, limit)
+        except Exception:
+            logger.exception('Precomputing recommendations failed for user %s', user_id)
+            failed_user_ids.append(user_id)
+    return results, failed_user_ids
+
+
+class Command(BaseCommand):
+    help = 'Precompute recommendations for recently active users and write them to the recommendation cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=7,
+                            help='Users with behavior in the last N days count as active')
+        parser.add_argument('--limit', type=int, default=12,
+                            help='Recommendations generated per user')
+        parser.add_argument('--workers', type=int, default=multiprocessing.cpu_count(),
+                            help='Size of the multiprocessing pool (1 runs inline)')
+        parser.add_argument('--chunk-size', type=int, default=100,
+                            help='Users handed to a worker at a time')
+        parser.add_argument('--min-user-id', type=int, default=None)
+        parser.add_argument('--max-user-id', type=int, default=None)
+        parser.add_argument('--shard', default=None,
+                            help='INDEX/COUNT, e.g. 0/4: only users whose id %% COUNT == INDEX')
+
+    def handle(self, *args, **options):
+        active = UserBehavior.objects.filter(
+            timestamp__gte=timezone.now() - timedelta(days=options['days'])
+        ).order_by()
+
+        if options['min_user_id'] is not None:
+            active = active.filter(user_id__gte=options['min_user_id'])
+        if options['max_user_id'] is not None:
+            active = active.filter(user_id__lte=options['max_user_id'])
+        if options['shard']:
+            index, count = self._parse_shard(options['shard'])
+            # Depends only on the id, so machines started at different times still partition exactly
+            active = active.alias(shard=Mod('user_id', count)).filter(shard=index)
+
+        user_ids = sorted(active.values_list('user_id', flat=True).distinct())
+        if not user_ids:
+            self.stdout.write(self.style.WARNING('No active users in range'))
+            return
+
+        engine = RecommendationEngine()
+        cache = engine.recommendation_cache
+        if is_process_local(caches[cache.cache_alias]) and not cache.use_database:
+            self.stdout.write(self.style.WARNING(
+                'The shared cache is process-local LocMemCache, so web workers will not see these results. '
+                "Configure a shared CACHES backend or set RECOMMENDATIONS['CACHE_USE_DATABASE']."
+            ))
+
+        self.stdout.write(
+            f"Precomputing recommendations for {len(user_ids)} users "
+            f"(ids {user_ids[0]}-{user_ids[-1]}) with {options['workers']} workers..."
+        )
+
+        chunks = [
+            (user_ids[start:start + options['chunk_size']], options['limit'])
+            for start in range(0, len(user_ids), options['chunk_size'])
+        ]
+
+        started = time.perf_counter()
+        written = 0
+        failed_user_ids = []
+
+        if options['workers'] <= 1:
+            _init_worker()
+            results = map(_generate_chunk, chunks)
+            written, failed_user_ids = self._write_results(engine, results)
+        else:
+            # Children must open their own connections
+            connections.close_all()
+            with multiprocessing.Pool(options['workers'], initializer=_init_worker) as pool:
+                written, failed_user_ids = self._write_results(engine, pool.imap_unordered(_generate_chunk, chunks))
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Cached recommendations for {written} users in {elapsed:.1f}s '
+                f'({len(user_ids) / elapsed if elapsed else 0:.1f} users/s, {len(failed_user_ids)} failures)'
+            )
+        )
+        if failed_user_ids:
+            failed_user_ids.sort()
+            listed = ', '.join(str(user_id) for user_id in failed_user_ids[:MAX_REPORTED_FAILURES])
+            more = len(failed_user_ids) - MAX_REPORTED_FAILURES
+            self.stdout.write(self.style.ERROR(
+                f'Failed for users {listed}' + (f' and {more} more' if more > 0 else '') + '; see the log for tracebacks'
+            ))
+
+    def _parse_shard(self, shard):
+        try:
+            index, count = (int(part) for part in shard.split('/'))
+        except ValueError:
+            raise CommandError('--shard must look like INDEX/COUNT, e.g. 0/4')
+        if not 0 <= index < count:
+            raise CommandError('--shard INDEX must be between 0 and COUNT - 1')
+        return index, count
+
+    def _write_results(self, engine, results):
+        written = 0
+        failed_user_ids = []
+        for chunk_results, chunk_failures in results:
+            failed_user_ids.extend(chunk_failures)
+
+            by_version = defaultdict(dict)
+            for user_id, recommendations in chunk_results.items():
+                # Empty lists are treated as misses, so there is nothing to cache
+                if recommendations:
+                    by_version[engine.algorithm_version_for(recommendations)][user_id] = recommendations
+
+            for version, recommendations_by_user in by_version.items():
+                engine.recommendation_cache.set_many(recommendations_by_user, version)
+                written += len(recommendations_by_user)
+
+        return written, failed_user_ids
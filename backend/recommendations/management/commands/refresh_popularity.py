@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from recommendations.conf import get_setting
+from recommendations.popularity import prune_popularity, rebuild_popularity
+
+
+class Command(BaseCommand):
+    help = 'Prune faded entries from the time-decayed artwork popularity table (run daily)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true',
+                            help='Recompute every score from UserBehavior history instead '
+                                 '(required after changing POPULARITY_HALF_LIFE_DAYS)')
+        parser.add_argument('--min-score', type=float, default=1e-3,
+                            help='Drop rows whose decayed score falls below this')
+
+    def handle(self, *args, **options):
+        half_life_days = get_setting('POPULARITY_HALF_LIFE_DAYS')
+
+        if options['rebuild']:
+            self.stdout.write('Rebuilding artwork popularity...')
+            count = rebuild_popularity(half_life_days)
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt popularity for {count} artworks'))
+            return
+
+        self.stdout.write('Pruning artwork popularity...')
+        pruned = prune_popularity(half_life_days, min_score=options['min_score'])
+        self.stdout.write(self.style.SUCCESS(f'Pruned {pruned} faded entries'))
@@ -0,0 +1,48 @@
+import time
+
+from django.core.management.base import BaseCommand
+from recommendations.conf import get_setting
+from recommendations.factorization import load_interactions, save_model, train_als
+
+
+class Command(BaseCommand):
+    help = 'Train the implicit-feedback ALS model used for collaborative recommendations'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None,
+                            help='Only train on behavior from the last N days (default: all retained raw history)')
+        parser.add_argument('--factors', type=int, default=32)
+        parser.add_argument('--iterations', type=int, default=10)
+        parser.add_argument('--regularization', type=float, default=0.1)
+        parser.add_argument('--alpha', type=float, default=2.0,
+                            help='Confidence scaling for summed action weights')
+        parser.add_argument('--output-dir', default=None,
+                            help="Artifact directory (default: RECOMMENDATIONS['MODEL_DIR'])")
+        parser.add_argument('--keep', type=int, default=3,
+                            help='Number of model versions to keep on disk')
+
+    def handle(self, *args, **options):
+        self.stdout.write('Loading interactions...')
+        user_ids, artwork_ids, strengths = load_interactions(days=options['days'])
+
+        if not len(strengths):
+            self.stdout.write(self.style.WARNING('No interactions to train on'))
+            return
+
+        self.stdout.write(f'Training on {len(strengths)} user-artwork pairs...')
+        started = time.perf_counter()
+        model = train_als(
+            user_ids, artwork_ids, strengths,
+            factors=options['factors'],
+            regularization=options['regularization'],
+            alpha=options['alpha'],
+            iterations=options['iterations'],
+        )
+        version = save_model(options['output_dir'] or get_setting('MODEL_DIR'), model, keep=options['keep'])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Published {version}: {len(model['user_ids'])} users, "
+                f"{len(model['artwork_ids'])} artworks in {time.perf_counter() - started:.1f}s"
+            )
+        )
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-17 20:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommendations', '0002_alter_userbehavior_action_type'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userpreferences',
+            name='artist_counts',
+            field=models.JSONField(default=list),
+        ),
+        migrations.AddField(
+            model_name='userpreferences',
+            name='category_counts',
+            field=models.JSONField(default=list),
+        ),
+        migrations.AddField(
+            model_name='userpreferences',
+            name='counts_since',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='userpreferences',
+            name='price_range_counts',
+            field=models.JSONField(default=list),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.6 on 2026-10-17 20:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommendations', '0003_userpreferences_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArtworkSimilarity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('artwork_id', models.IntegerField(unique=True)),
+                ('neighbours', models.JSONField(default=list)),
+                ('built_at', models.DateTimeField()),
+            ],
+        ),
+    ]
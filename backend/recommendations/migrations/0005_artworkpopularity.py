@@ -0,0 +1,22 @@
+# Generated by Django 5.2.6 on 2026-10-17 20:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommendations', '0004_artworksimilarity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArtworkPopularity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('artwork_id', models.IntegerField(unique=True)),
+                ('score', models.FloatField(db_index=True, default=0)),
+                ('decayed_at', models.DateTimeField()),
+            ],
+        ),
+    ]
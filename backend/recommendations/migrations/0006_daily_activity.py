@@ -0,0 +1,44 @@
+# Generated by Django 5.2.6 on 2026-10-17 20:45
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommendations', '0005_artworkpopularity'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyArtworkActivity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('artwork_id', models.IntegerField()),
+                ('date', models.DateField()),
+                ('action_type', models.CharField(max_length=20)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['artwork_id', 'date'], name='recommendat_artwork_529558_idx'), models.Index(fields=['action_type', 'date'], name='recommendat_action__b0d7e9_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyUserActivity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('action_type', models.CharField(max_length=20)),
+                ('category', models.CharField(blank=True, max_length=50, null=True)),
+                ('artist_id', models.IntegerField(blank=True, null=True)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'date'], name='recommendat_user_id_a6edeb_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.6 on 2026-10-17 20:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommendations', '0006_daily_activity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingSearchCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('window_start', models.DateTimeField()),
+                ('category', models.CharField(blank=True, default='', max_length=50)),
+                ('counts', models.JSONField(default=list)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('window_start', 'category'), name='unique_trending_window_category')],
+            },
+        ),
+    ]
@@ -0,0 +1,70 @@
+import math
+from datetime import datetime, timezone
+
+from django.db import migrations, models
+from django.utils import timezone as django_timezone
+
+# Must match recommendations.popularity.POPULARITY_EPOCH
+EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def to_log_scores(apps, schema_editor):
+    from recommendations.conf import get_setting
+
+    half_life_days = get_setting('POPULARITY_HALF_LIFE_DAYS')
+    ArtworkPopularity = apps.get_model('recommendations', 'ArtworkPopularity')
+    ArtworkPopularity.objects.filter(score__lte=0).delete()
+    rows = list(ArtworkPopularity.objects.all())
+    for row in rows:
+        growth = (row.decayed_at - EPOCH).total_seconds() / 86400 * math.log(2) / half_life_days
+        row.log_score = math.log(row.score) + growth
+    ArtworkPopularity.objects.bulk_update(rows, ['log_score'], batch_size=1000)
+
+
+def from_log_scores(apps, schema_editor):
+    from recommendations.conf import get_setting
+
+    half_life_days = get_setting('POPULARITY_HALF_LIFE_DAYS')
+    ArtworkPopularity = apps.get_model('recommendations', 'ArtworkPopularity')
+    now = django_timezone.now()
+    growth = (now - EPOCH).total_seconds() / 86400 * math.log(2) / half_life_days
+    rows = list(ArtworkPopularity.objects.all())
+    for row in rows:
+        row.score = math.exp(row.log_score - growth)
+        row.decayed_at = now
+    ArtworkPopularity.objects.bulk_update(rows, ['score', 'decayed_at'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommendations', '0007_trendingsearchcheckpoint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='artworkpopularity',
+            name='log_score',
+            field=models.FloatField(null=True),
+        ),
+        # Nullable while the data moves, so a rollback can re-add it before refilling it
+        migrations.AlterField(
+            model_name='artworkpopularity',
+            name='decayed_at',
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.RunPython(to_log_scores, from_log_scores),
+        migrations.AlterField(
+            model_name='artworkpopularity',
+            name='log_score',
+            field=models.FloatField(db_index=True),
+        ),
+        migrations.RemoveField(
+            model_name='artworkpopularity',
+            name='score',
+        ),
+        migrations.RemoveField(
+            model_name='artworkpopularity',
+            name='decayed_at',
+        ),
+    ]
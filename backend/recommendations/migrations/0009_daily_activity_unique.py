@@ -0,0 +1,51 @@
+# Generated by Django 5.2.6 on 2026-10-17 21:38
+
+import django.db.models.functions.comparison
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, F, Min, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def merge_duplicates(apps, schema_editor):
+    # Overlapping rollup runs could write the same key twice; fold each
+    # group into its oldest row so the constraints can be added
+    groups = (
+        ('DailyUserActivity', (
+            F('user_id'), F('date'), F('action_type'),
+            Coalesce('category', Value('')), Coalesce('artist_id', Value(0)),
+        )),
+        ('DailyArtworkActivity', (F('artwork_id'), F('date'), F('action_type'))),
+    )
+    for model_name, key in groups:
+        model = apps.get_model('recommendations', model_name)
+        names = [f'key_{index}' for index in range(len(key))]
+        duplicates = model.objects.annotate(**dict(zip(names, key))).values(*names).annotate(
+            rows=Count('id'), keep=Min('id'), total=Sum('count')
+        ).filter(rows__gt=1)
+        for group in duplicates:
+            same_key = model.objects.annotate(**dict(zip(names, key))).filter(
+                **{name: group[name] for name in names}
+            )
+            same_key.exclude(id=group['keep']).delete()
+            model.objects.filter(id=group['keep']).update(count=group['total'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommendations', '0008_popularity_log_score'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='dailyartworkactivity',
+            constraint=models.UniqueConstraint(fields=('artwork_id', 'date', 'action_type'), name='unique_daily_artwork_activity'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailyuseractivity',
+            constraint=models.UniqueConstraint(models.F('user'), models.F('date'), models.F('action_type'), django.db.models.functions.comparison.Coalesce('category', models.Value('')), django.db.models.functions.comparison.Coalesce('artist_id', models.Value(0)), name='unique_daily_user_activity'),
+        ),
+    ]
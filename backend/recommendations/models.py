@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce
 from django.conf import settings
 
 class UserBehavior(models.Model):
@@ -35,6 +37,12 @@ class UserPreferences(models.Model):
     preferred_categories = models.JSONField(default=list)
     preferred_price_range = models.CharField(max_length=20, default='medium')
     preferred_artists = models.JSONField(default=list)
+    # Running [key, count] pairs over the behavior window, least recent first
+    category_counts = models.JSONField(default=list)
+    artist_counts = models.JSONField(default=list)
+    price_range_counts = models.JSONField(default=list)
+    # Start of the window the counters cover; null until they are first built
+    counts_since = models.DateTimeField(null=True, blank=True)
     last_updated = models.DateTimeField(auto_now=True)
 
 class RecommendationCache(models.Model):
@@ -49,3 +57,73 @@ class RecommendationCache(models.Model):
         indexes = [
             models.Index(fields=['user', 'expires_at']),
         ]
+
+
+class ArtworkSimilarity(models.Model):
+    """Top item-item neighbours for one artwork, built offline from UserBehavior"""
+    artwork_id = models.IntegerField(unique=True)
+    # [{'artwork_id': ..., 'score': ..., 'co_occurrences': ...}] best first
+    neighbours = models.JSONField(default=list)
+    built_at = models.DateTimeField()
+
+
+class ArtworkPopularity(models.Model):
+    """Exponentially time-decayed like/purchase popularity per artwork"""
+    artwork_id = models.IntegerField(unique=True)
+    # log(score) + t / tau relative to popularity.POPULARITY_EPOCH; decay never rewrites it
+    log_score = models.FloatField(db_index=True)
+
+
+class DailyUserActivity(models.Model):
+    """Per-user daily event counts rolled up from UserBehavior past its retention age"""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    date = models.DateField()
+    action_type = models.CharField(max_length=20)
+    category = models.CharField(max_length=50, null=True, blank=True)
+    artist_id = models.IntegerField(null=True, blank=True)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'date']),
+        ]
+        constraints = [
+            # Blank category and artist count as one key, as they do for the rollup
+            models.UniqueConstraint(
+                F('user'), F('date'), F('action_type'),
+                Coalesce('category', Value('')), Coalesce('artist_id', Value(0)),
+                name='unique_daily_user_activity',
+            ),
+        ]
+
+
+class DailyArtworkActivity(models.Model):
+    """Per-artwork daily event counts rolled up from UserBehavior past its retention age"""
+    artwork_id = models.IntegerField()
+    date = models.DateField()
+    action_type = models.CharField(max_length=20)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['artwork_id', 'date']),
+            models.Index(fields=['action_type', 'date']),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['artwork_id', 'date', 'action_type'], name='unique_daily_artwork_activity'),
+        ]
+
+
+class TrendingSearchCheckpoint(models.Model):
+    """Heavy-hitter search counts for one time window, merged from every worker"""
+    window_start = models.DateTimeField()
+    # Empty for the global ranking
+    category = models.CharField(max_length=50, blank=True, default='')
+    # [[normalized query, count], ...]
+    counts = models.JSONField(default=list)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['window_start', 'category'], name='unique_trending_window_category'),
+        ]
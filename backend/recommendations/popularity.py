@@ -0,0 +1,131 @@
+import math
+from collections import defaultdict
+from datetime import datetime, time, timezone as dt_timezone
+from typing import Iterable, List, Tuple
+
+from django.db import transaction
+from django.utils import timezone
+
+from .conf import get_setting
+from .models import ArtworkPopularity, DailyArtworkActivity, UserBehavior
+
+# Contribution of each event before decay
+POPULARITY_WEIGHTS = {
+    'like': 1.0,
+    'purchase': 1.0,
+}
+
+# Scores are stored as log(score) + t / tau with t measured from this fixed
+# epoch. Decay shifts every row by the same amount, so stored values never
+# need rewriting and ordering by them is exact for touched and idle rows alike.
+POPULARITY_EPOCH = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+
+# Placeholder for a row that has no events folded in yet
+EMPTY_LOG_SCORE = -1e300
+
+
+def decay_factor(since: datetime, until: datetime, half_life_days: float) -> float:
+    elapsed_days = (until - since).total_seconds() / 86400
+    return 0.5 ** (elapsed_days / half_life_days)
+
+
+def _growth(moment: datetime, half_life_days: float) -> float:
+    """t / tau for a moment: how much log-score an event at that moment starts with"""
+    return (moment - POPULARITY_EPOCH).total_seconds() / 86400 * math.log(2) / half_life_days
+
+
+def _logaddexp(a: float, b: float) -> float:
+    high, low = max(a, b), min(a, b)
+    return high + math.log1p(math.exp(low - high))
+
+
+def to_log_score(score: float, moment: datetime, half_life_days: float) -> float:
+    """Stored value for a decayed score as of moment"""
+    return math.log(score) + _growth(moment, half_life_days)
+
+
+def from_log_score(log_score: float, moment: datetime, half_life_days: float) -> float:
+    """Decayed score as of moment for a stored value"""
+    return math.exp(log_score - _growth(moment, half_life_days))
+
+
+def record_popularity_events(events: Iterable[Tuple[int, str, datetime]], half_life_days: float):
+    """Fold (artwork_id, action_type, timestamp) events into the popularity table
+
+    Each event adds its weight at its own timestamp in log space, so no row
+    is ever decayed on write and untouched rows stay exactly comparable.
+    """
+    increments = {}
+    for artwork_id, action_type, timestamp in events:
+        if artwork_id and action_type in POPULARITY_WEIGHTS:
+            value = math.log(POPULARITY_WEIGHTS[action_type]) + _growth(timestamp, half_life_days)
+            increments[artwork_id] = _logaddexp(increments.get(artwork_id, EMPTY_LOG_SCORE), value)
+
+    if not increments:
+        return
+
+    with transaction.atomic():
+        ArtworkPopularity.objects.bulk_create(
+            [ArtworkPopularity(artwork_id=artwork_id, log_score=EMPTY_LOG_SCORE) for artwork_id in increments],
+            ignore_conflicts=True
+        )
+        # Lock in a fixed order so concurrent batches cannot deadlock
+        rows = list(
+            ArtworkPopularity.objects.select_for_update().filter(artwork_id__in=list(increments)).order_by('artwork_id')
+        )
+        for row in rows:
+            row.log_score = _logaddexp(row.log_score, increments[row.artwork_id])
+        ArtworkPopularity.objects.bulk_update(rows, ['log_score'])
+
+
+def prune_popularity(half_life_days: float, min_score: float = 1e-3) -> int:
+    """Drop rows whose decayed score has faded below min_score"""
+    threshold = to_log_score(min_score, timezone.now(), half_life_days)
+    pruned, _ = ArtworkPopularity.objects.filter(log_score__lt=threshold).delete()
+    return pruned
+
+
+def rebuild_popularity(half_life_days: float) -> int:
+    """Recompute the whole table from UserBehavior history and its daily rollups"""
+    now = timezone.now()
+    scores = defaultdict(float)
+
+    # Rolled-up days are decayed from midday, which is within half a day of every event
+    rollups = DailyArtworkActivity.objects.filter(
+        action_type__in=list(POPULARITY_WEIGHTS)
+    ).values_list('artwork_id', 'action_type', 'date', 'count')
+    for artwork_id, action_type, date, count in rollups.iterator(chunk_size=5000):
+        midday = timezone.make_aware(datetime.combine(date, time(12)))
+        scores[artwork_id] += POPULARITY_WEIGHTS[action_type] * count * decay_factor(midday, now, half_life_days)
+
+    events = UserBehavior.objects.filter(
+        action_type__in=list(POPULARITY_WEIGHTS),
+        artwork_id__isnull=False
+    ).order_by().values_list('artwork_id', 'action_type', 'timestamp')
+
+    for artwork_id, action_type, timestamp in events.iterator(chunk_size=5000):
+        scores[artwork_id] += POPULARITY_WEIGHTS[action_type] * decay_factor(timestamp, now, half_life_days)
+
+    with transaction.atomic():
+        ArtworkPopularity.objects.all().delete()
+        ArtworkPopularity.objects.bulk_create(
+            [
+                ArtworkPopularity(artwork_id=artwork_id, log_score=to_log_score(score, now, half_life_days))
+                for artwork_id, score in scores.items() if score > 0
+            ],
+            batch_size=1000
+        )
+
+    return len(scores)
+
+
+def top_popular(limit: int, half_life_days: float = None) -> List[Tuple[int, float]]:
+    """Most popular (artwork_id, decayed score) pairs, read straight off the log-score index"""
+    half_life_days = half_life_days or get_setting('POPULARITY_HALF_LIFE_DAYS')
+    now = timezone.now()
+    return [
+        (artwork_id, from_log_score(log_score, now, half_life_days))
+        for artwork_id, log_score in ArtworkPopularity.objects.order_by('-log_score').values_list(
+            'artwork_id', 'log_score'
+        )[:limit]
+    ]
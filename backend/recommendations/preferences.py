@@ -0,0 +1,69 @@
+from collections import Counter
+from typing import Any, Iterable, List, Optional, Tuple
+
+
+class RecencyCounter:
+    """Counter that remembers the order its keys were last seen in
+
+    Keys are kept from least to most recently seen, so ties in most_common()
+    go to the most recent key. That matches a Counter filled while iterating
+    behaviors newest first, which is how preferences were originally computed.
+    """
+
+    def __init__(self, pairs: Iterable[Tuple[Any, int]] = ()):
+        self._counts = {key: count for key, count in pairs}
+
+    def add(self, key, count: int = 1):
+        # Re-inserting moves the key to the most recent end
+        self._counts[key] = self._counts.pop(key, 0) + count
+
+    def discard(self, key, count: int = 1):
+        remaining = self._counts.get(key, 0) - count
+        if remaining > 0:
+            self._counts[key] = remaining
+        else:
+            self._counts.pop(key, None)
+
+    def most_common(self, n: Optional[int] = None) -> List[Tuple[Any, int]]:
+        return Counter(dict(reversed(list(self._counts.items())))).most_common(n)
+
+    def to_pairs(self) -> List[List[Any]]:
+        # Stored as pairs rather than a dict because jsonb does not keep key order
+        return [[key, count] for key, count in self._counts.items()]
+
+
+class PreferenceCounters:
+    """Running category, artist and price range counts for one user"""
+
+    def __init__(self, preferences=None):
+        self.categories = RecencyCounter(preferences.category_counts if preferences else ())
+        self.artists = RecencyCounter(preferences.artist_counts if preferences else ())
+        self.price_ranges = RecencyCounter(preferences.price_range_counts if preferences else ())
+
+    def add(self, category=None, artist_id=None, price_range=None):
+        """Count one event, applied in chronological order"""
+        if category:
+            self.categories.add(category)
+        if price_range:
+            self.price_ranges.add(price_range)
+        if artist_id:
+            self.artists.add(artist_id)
+
+    def discard(self, category=None, artist_id=None, price_range=None, count: int = 1):
+        """Remove events that have fallen out of the behavior window"""
+        if category:
+            self.categories.discard(category, count)
+        if price_range:
+            self.price_ranges.discard(price_range, count)
+        if artist_id:
+            self.artists.discard(artist_id, count)
+
+    def apply_to(self, preferences):
+        """Write the counters and the derived preferred lists onto preferences"""
+        preferences.category_counts = self.categories.to_pairs()
+        preferences.artist_counts = self.artists.to_pairs()
+        preferences.price_range_counts = self.price_ranges.to_pairs()
+        preferences.preferred_categories = [cat for cat, count in self.categories.most_common(5)]
+        preferences.preferred_artists = [artist_id for artist_id, count in self.artists.most_common(10)]
+        top_price_range = self.price_ranges.most_common(1)
+        preferences.preferred_price_range = top_price_range[0][0] if top_price_range else 'medium'
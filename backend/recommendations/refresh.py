@@ -0,0 +1,71 @@
+import logging
+import os
+import threading
+from typing import Callable
+
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundRefresher:
+    """Daemon thread that calls rebuild() every interval seconds
+
+    Request paths call ensure_built(), which builds once on the calling
+    thread if nothing has been built yet (concurrent callers wait for that
+    one build) and then leaves every later rebuild to the thread: the index
+    keeps answering from what it built last until rebuild() swaps the new
+    contents in under its own lock. request() wakes the thread early.
+    """
+
+    def __init__(self, rebuild: Callable[[], None], interval: float, name: str):
+        self.rebuild = rebuild
+        self.interval = interval
+        self.name = name
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._wakeup = threading.Event()
+
+    def ensure_started(self, built: bool = False):
+        """Start the thread in this process if it is not running; built skips the first rebuild"""
+        if self._is_running():
+            return
+        with self._lock:
+            # A thread started before a fork does not exist in the child worker
+            if self._is_running():
+                return
+            self._pid = os.getpid()
+            if not built:
+                self._wakeup.set()
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def ensure_built(self, is_built: Callable[[], bool]):
+        """Build on this thread if is_built() says nothing has been, then keep the thread running"""
+        if not is_built():
+            with self._build_lock:
+                if not is_built():
+                    self.rebuild()
+        self.ensure_started(built=True)
+
+    def request(self):
+        """Rebuild as soon as possible instead of waiting out the interval"""
+        self._wakeup.set()
+
+    def _is_running(self):
+        return self._thread is not None and self._pid == os.getpid() and self._thread.is_alive()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            close_old_connections()
+            try:
+                self.rebuild()
+            except Exception:
+                # Keep serving the previous index
+                logger.exception('%s rebuild failed', self.name)
+            finally:
+                close_old_connections()
@@ -0,0 +1,103 @@
+from collections import Counter
+from datetime import timedelta
+from typing import Iterable, Tuple
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import DailyArtworkActivity, DailyUserActivity, UserBehavior
+
+
+def _key(values) -> tuple:
+    # Blank and NULL are one key, as in the aggregate tables' unique constraints
+    return tuple(None if value == '' else value for value in values)
+
+
+def _merge_counts(model, counts: Counter, key_fields: Tuple[str, ...], lookup):
+    """Add counts to existing aggregate rows, creating the ones that are missing"""
+    existing = {
+        _key(getattr(row, field) for field in key_fields): row
+        for row in model.objects.select_for_update().filter(**lookup)
+    }
+
+    updated = []
+    created = []
+    for key, count in counts.items():
+        row = existing.get(key)
+        if row is not None:
+            row.count += count
+            updated.append(row)
+        else:
+            created.append(model(count=count, **dict(zip(key_fields, key))))
+
+    model.objects.bulk_update(updated, ['count'])
+    model.objects.bulk_create(created)
+
+
+def rollup_behavior(older_than_days: int, keep_actions: Iterable[str] = (), chunk_size: int = 5000) -> Tuple[int, int]:
+    """Move raw behavior older than older_than_days into the daily aggregate tables
+
+    Rows are processed in id order, chunk_size at a time. Each chunk is
+    claimed by deleting it, then counted into DailyUserActivity and
+    DailyArtworkActivity in the same transaction, so every event lives in
+    exactly one place: the raw table or the aggregates. Rows another run
+    has locked are skipped, and a chunk that another run deleted part of
+    first is rolled back and read again, so overlapping runs never count
+    an event twice. Actions in keep_actions are left raw.
+    Returns (events rolled up, days touched).
+    """
+    # Roll whole days only, so a day is never split between raw and aggregate
+    cutoff = timezone.localtime(timezone.now() - timedelta(days=older_than_days)).replace(
+        hour=0, minute=0, second=0, microsecond=0
+    )
+    expired = UserBehavior.objects.filter(timestamp__lt=cutoff).exclude(action_type__in=list(keep_actions))
+
+    rolled = 0
+    days = set()
+    last_id = 0
+
+    while True:
+        try:
+            with transaction.atomic():
+                rows = list(
+                    expired.filter(id__gt=last_id).order_by('id').select_for_update(skip_locked=True).values_list(
+                        'id', 'user_id', 'action_type', 'category', 'artist_id', 'artwork_id', 'timestamp'
+                    )[:chunk_size]
+                )
+                if not rows:
+                    break
+
+                # Claim the chunk before counting it; where row locks are not
+                # available an overlapping run may have deleted some rows first
+                deleted = UserBehavior.objects.filter(id__in=[row[0] for row in rows]).delete()[1]
+                if deleted.get(UserBehavior._meta.label, 0) != len(rows):
+                    transaction.set_rollback(True)
+                    continue
+
+                user_counts = Counter()
+                artwork_counts = Counter()
+                for _, user_id, action_type, category, artist_id, artwork_id, timestamp in rows:
+                    date = timezone.localtime(timestamp).date()
+                    user_counts[_key((user_id, date, action_type, category, artist_id))] += 1
+                    if artwork_id:
+                        artwork_counts[(artwork_id, date, action_type)] += 1
+                chunk_days = {key[1] for key in user_counts}
+
+                _merge_counts(
+                    DailyUserActivity, user_counts, ('user_id', 'date', 'action_type', 'category', 'artist_id'),
+                    {'user_id__in': {key[0] for key in user_counts}, 'date__in': chunk_days}
+                )
+                _merge_counts(
+                    DailyArtworkActivity, artwork_counts, ('artwork_id', 'date', 'action_type'),
+                    {'artwork_id__in': {key[0] for key in artwork_counts}, 'date__in': chunk_days}
+                )
+        except IntegrityError:
+            # An overlapping run created one of these aggregate rows first; the
+            # raw rows were restored, so count the chunk again
+            continue
+
+        last_id = rows[-1][0]
+        days |= chunk_days
+        rolled += len(rows)
+
+    return rolled, len(days)
@@ -1,170 +1,402 @@
+from django.db import transaction
+from django.db.models import Count
 from django.utils import timezone
-from django.contrib.auth import get_user_model
 from datetime import timedelta
 from collections import Counter, defaultdict
 import json
+import logging
 import math
-from typing import List, Dict, Any
-from .models import UserBehavior, UserPreferences, RecommendationCache
+from typing import List, Dict, Any, Optional
+from .cache import TieredRecommendationCache
+from .conf import get_setting
+from .covisitation import CoVisitationIndex
+from .factorization import FactorModel, FactorModelStore
+from .features import artwork_features
+from .hydration import artwork_hydrator
+from .insights import BehaviorInsights
+from .instrumentation import PipelineMetrics, PipelineTrace
+from .popularity import record_popularity_events, top_popular
+from .models import UserBehavior, UserPreferences
+from .preferences import PreferenceCounters
+from .similarity import MinHashUserIndex, UserSimilarityIndex
+from .trending import TrendingSearches
+from .versions import VersionRouter
 
-User = get_user_model()
+logger = logging.getLogger(__name__)
 
 class RecommendationEngine:
     """AI-powered recommendation engine"""
     
     def __init__(self):
-        self.algorithm_version = "v1"
+        self.base_algorithm_version = "v1"
         self.cache_duration = timedelta(hours=6)
+        self.behavior_window = timedelta(days=30)
+        self.popularity_half_life_days = get_setting('POPULARITY_HALF_LIFE_DAYS')
+        # How far counters may lag the window before an event expires them inline
+        self.preference_expiry_slack = timedelta(days=1)
+        if get_setting('SIMILAR_USERS_MODE') == 'minhash':
+            self.similarity_index = MinHashUserIndex(
+                window=self.behavior_window,
+                bands=get_setting('MINHASH_BANDS'),
+                rows=get_setting('MINHASH_ROWS'),
+            )
+        else:
+            self.similarity_index = UserSimilarityIndex(window=self.behavior_window)
+        self.recommendation_cache = TieredRecommendationCache(
+            ttl=self.cache_duration,
+            local_max_entries=get_setting('LOCAL_CACHE_MAX_ENTRIES'),
+            local_ttl=get_setting('LOCAL_CACHE_TTL'),
+            cache_alias=get_setting('CACHE_ALIAS'),
+            use_database=get_setting('CACHE_USE_DATABASE'),
+        )
+        self.covisitation = CoVisitationIndex(
+            days=get_setting('COVISITATION_DAYS'),
+            neighbours=get_setting('COVISITATION_NEIGHBOURS'),
+            session_length=get_setting('COVISITATION_SESSION_LENGTH'),
+            session_ttl=get_setting('COVISITATION_SESSION_TTL'),
+            cache_alias=get_setting('CACHE_ALIAS'),
+        )
+        self.trending_searches = TrendingSearches(
+            capacity=get_setting('TRENDING_SEARCH_CAPACITY'),
+            window=timedelta(seconds=get_setting('TRENDING_SEARCH_WINDOW')),
+            checkpoint_interval=get_setting('TRENDING_SEARCH_CHECKPOINT_INTERVAL'),
+        )
+        self.behavior_insights = BehaviorInsights(
+            window=self.behavior_window,
+            cache_alias=get_setting('CACHE_ALIAS'),
+        )
+        self.artwork_hydrator = artwork_hydrator
+        self.pipeline_metrics = PipelineMetrics()
+        self.factor_models = FactorModelStore(
+            get_setting('MODEL_DIR'),
+            check_interval=get_setting('MODEL_CHECK_INTERVAL'),
+        )
+        self.versions = VersionRouter(
+            weights=get_setting('ALGORITHM_VERSIONS'),
+            default=self.base_algorithm_version,
+            salt=get_setting('ALGORITHM_ASSIGNMENT_SALT'),
+            shadows=get_setting('SHADOW_VERSIONS'),
+            shadow_async=get_setting('SHADOW_ASYNC'),
+            shadow_max_pending=get_setting('SHADOW_MAX_PENDING'),
+        )
+        self.versions.register('v1', self._generate_recommendations)
+        self.versions.register('content-only', self._generate_content_recommendations)
+    
+    @property
+    def algorithm_version(self) -> str:
+        """Version that would serve a request generated right now"""
+        model = self.factor_models.get()
+        return model.version if model is not None else self.base_algorithm_version
+    
+    def algorithm_version_for(self, recommendations: List[Dict[str, Any]]) -> str:
+        """Version that produced these (possibly cached) recommendations"""
+        for rec in recommendations:
+            if rec.get('model_version'):
+                return rec['model_version']
+        for rec in recommendations:
+            if rec.get('algorithm_version'):
+                return rec['algorithm_version']
+        return self.base_algorithm_version
     
     def track_user_behavior(self, user_id: int, action_type: str, **kwargs):
         """Track user behavior for learning"""
-        UserBehavior.objects.create(
+        behavior = UserBehavior.objects.create(
             user_id=user_id,
             action_type=action_type,
             **kwargs
         )
         
+        # Keep the neighbour index in step with the new event
+        self.similarity_index.add(user_id, kwargs.get('category'), kwargs.get('artist_id'), kwargs.get('artwork_id'))
+        if action_type == 'view':
+            self.covisitation.add_view(kwargs.get('session_id'), kwargs.get('artwork_id'))
+        elif action_type == 'search':
+            self.trending_searches.add(kwargs.get('search_query'), kwargs.get('category'))
+        
         # Update user preferences after tracking
-        self._update_user_preferences(user_id)
+        self._update_user_preferences(user_id, [behavior])
+        
+        record_popularity_events(
+            [(behavior.artwork_id, behavior.action_type, behavior.timestamp)],
+            self.popularity_half_life_days
+        )
+        
+        self.behavior_insights.record([(user_id, action_type)])
+        
+        # Cached recommendations no longer reflect this user's behavior
+        self.recommendation_cache.invalidate(user_id)
     
-    def get_recommendations(self, user_id: int, limit: int = 12) -> List[Dict[str, Any]]:
-        """Get AI recommendations for a user"""
+    def track_user_behaviors(self, events: List[Dict[str, Any]]) -> List[UserBehavior]:
+        """Track a batch of behavior events with a single insert"""
+        behaviors = [UserBehavior(**event) for event in events]
+        
+        with transaction.atomic():
+            UserBehavior.objects.bulk_create(behaviors)
+            
+            behaviors_by_user = defaultdict(list)
+            for behavior in behaviors:
+                behaviors_by_user[behavior.user_id].append(behavior)
+            
+            # One preference update per affected user rather than per event
+            for user_id, user_behaviors in behaviors_by_user.items():
+                self._update_user_preferences(user_id, user_behaviors)
+            
+            record_popularity_events(
+                [(b.artwork_id, b.action_type, b.timestamp) for b in behaviors],
+                self.popularity_half_life_days
+            )
+        
+        # The rows are committed, so a failing cache or index update must not
+        # propagate: the caller would retry and insert the same events again
+        try:
+            for user_id in behaviors_by_user:
+                self.recommendation_cache.invalidate(user_id)
+        except Exception:
+            logger.exception('Invalidating cached recommendations after tracking %d events failed', len(behaviors))
+        
+        try:
+            self.behavior_insights.record((b.user_id, b.action_type) for b in behaviors)
+        except Exception:
+            logger.exception('Updating behavior insights after tracking %d events failed', len(behaviors))
+        
+        try:
+            for behavior in behaviors:
+                self.similarity_index.add(behavior.user_id, behavior.category, behavior.artist_id, behavior.artwork_id)
+                if behavior.action_type == 'view':
+                    self.covisitation.add_view(behavior.session_id, behavior.artwork_id)
+                elif behavior.action_type == 'search':
+                    self.trending_searches.add(behavior.search_query, behavior.category)
+        except Exception:
+            # The next index rebuilds read these events from the database
+            logger.exception('Updating in-memory indexes after tracking %d events failed', len(behaviors))
+        
+        return behaviors
+    
+    def get_recommendations(self, user_id: int, limit: int = 12, trace: Optional[PipelineTrace] = None) -> List[Dict[str, Any]]:
+        """Get AI recommendations for a user, recording stage timings on trace if given"""
+        trace = trace if trace is not None else PipelineTrace()
         
         # Check cache first
-        cached_recs = self._get_cached_recommendations(user_id)
+        with trace.stage('cache_lookup') as stage:
+            cached_recs = self._get_cached_recommendations(user_id)
+            stage.candidates_out = len(cached_recs or [])
         if cached_recs:
+            self.pipeline_metrics.record(trace)
+            self.versions.shadow(user_id, limit, cached_recs)
             return cached_recs[:limit]
         
-        # Generate new recommendations
-        recommendations = self._generate_recommendations(user_id, limit)
+        # Generate new recommendations with the user's assigned version
+        recommendations = self.generate_recommendations(user_id, limit, trace)
         
         # Cache the results
-        self._cache_recommendations(user_id, recommendations)
+        with trace.stage('cache_store', candidates_in=len(recommendations)):
+            self._cache_recommendations(user_id, recommendations)
+        self.pipeline_metrics.record(trace)
+        
+        # Candidate versions are scored against what was served, never returned
+        self.versions.shadow(user_id, limit, recommendations)
         
         return recommendations
     
-    def _update_user_preferences(self, user_id: int):
-        """Update user preferences based on behavior"""
-        # Get recent behavior (last 30 days)
-        thirty_days_ago = timezone.now() - timedelta(days=30)
+    def generate_recommendations(self, user_id: int, limit: int, trace: Optional[PipelineTrace] = None) -> List[Dict[str, Any]]:
+        """Generate fresh recommendations with the version this user is assigned to"""
+        return self.versions.generate(self.versions.assign(user_id), user_id, limit, trace)
+    
+    def get_session_recommendations(self, recent_artwork_ids: List[int], limit: int = 12) -> List[Dict[str, Any]]:
+        """Recommend next artworks from the views in the current session"""
+        scored = self.covisitation.score(recent_artwork_ids, limit * 2)
+        if not scored:
+            return []
+        
+        top_score = scored[0][1]
+        recommendations = []
+        for artwork_id, score in scored:
+            recommendations.append({
+                'artwork_id': artwork_id,
+                'match_score': round(50 + 45 * score / top_score, 1),
+                'reasons': ['Often viewed together with artworks you just looked at'],
+                'algorithm': 'session-covisitation'
+            })
+        
+        return self.artwork_hydrator.hydrate(recommendations)[:limit]
+    
+    def _update_user_preferences(self, user_id: int, behaviors: List[UserBehavior]):
+        """Fold newly tracked behaviors into the user's running preference counters"""
+        with transaction.atomic():
+            preferences = UserPreferences.objects.select_for_update().filter(user_id=user_id).first()
+            if preferences is None or preferences.counts_since is None:
+                # No counters yet, seed them from the full window (which includes these events)
+                self._rebuild_user_preferences(user_id)
+                return
+            
+            counters = PreferenceCounters(preferences)
+            for behavior in sorted(behaviors, key=lambda b: b.timestamp):
+                counters.add(behavior.category, behavior.artist_id, behavior.price_range)
+            
+            # Expire inline if the periodic pass has fallen behind
+            window_start = timezone.now() - self.behavior_window
+            if preferences.counts_since < window_start - self.preference_expiry_slack:
+                self._expire_counters(preferences, counters, window_start)
+            
+            counters.apply_to(preferences)
+            preferences.save()
+    
+    def _rebuild_user_preferences(self, user_id: int):
+        """Recompute user preferences from the whole behavior window"""
+        window_start = timezone.now() - self.behavior_window
         behaviors = UserBehavior.objects.filter(
             user_id=user_id,
-            timestamp__gte=thirty_days_ago
-        )
+            timestamp__gte=window_start
+        ).order_by('timestamp').values_list('category', 'artist_id', 'price_range')
+        
+        counters = PreferenceCounters()
+        for category, artist_id, price_range in behaviors:
+            counters.add(category, artist_id, price_range)
         
-        # Analyze behavior patterns
-        category_counts = Counter()
-        price_ranges = []
-        artist_counts = Counter()
-        
-        for behavior in behaviors:
-            if behavior.category:
-                category_counts[behavior.category] += 1
-            if behavior.price_range:
-                price_ranges.append(behavior.price_range)
-            if behavior.artist_id:
-                artist_counts[behavior.artist_id] += 1
-        
-        # Calculate preferences
-        preferred_categories = [cat for cat, count in category_counts.most_common(5)]
-        preferred_price_range = self._calculate_preferred_price_range(price_ranges)
-        preferred_artists = [artist_id for artist_id, count in artist_counts.most_common(10)]
-        
-        # Update or create preferences
-        preferences, created = UserPreferences.objects.get_or_create(
+        preferences = UserPreferences(user_id=user_id)
+        counters.apply_to(preferences)
+        preferences.counts_since = window_start
+        
+        UserPreferences.objects.update_or_create(
             user_id=user_id,
             defaults={
-                'preferred_categories': preferred_categories,
-                'preferred_price_range': preferred_price_range,
-                'preferred_artists': preferred_artists,
+                'preferred_categories': preferences.preferred_categories,
+                'preferred_price_range': preferences.preferred_price_range,
+                'preferred_artists': preferences.preferred_artists,
+                'category_counts': preferences.category_counts,
+                'artist_counts': preferences.artist_counts,
+                'price_range_counts': preferences.price_range_counts,
+                'counts_since': preferences.counts_since,
             }
         )
-        
-        if not created:
-            preferences.preferred_categories = preferred_categories
-            preferences.preferred_price_range = preferred_price_range
-            preferences.preferred_artists = preferred_artists
-            preferences.save()
     
-    def _calculate_preferred_price_range(self, price_ranges: List[str]) -> str:
-        """Calculate user's preferred price range"""
-        if not price_ranges:
-            return 'medium'
-        
-        counter = Counter(price_ranges)
-        return counter.most_common(1)[0][0]
+    def expire_user_preferences(self) -> int:
+        """Drop events that have left the behavior window from every user's counters"""
+        window_start = timezone.now() - self.behavior_window
+        user_ids = UserPreferences.objects.filter(
+            counts_since__lt=window_start
+        ).values_list('user_id', flat=True)
+        
+        expired = 0
+        for user_id in list(user_ids):
+            with transaction.atomic():
+                preferences = UserPreferences.objects.select_for_update().get(user_id=user_id)
+                counters = PreferenceCounters(preferences)
+                self._expire_counters(preferences, counters, window_start)
+                counters.apply_to(preferences)
+                preferences.save()
+            expired += 1
+        
+        return expired
+    
+    def _expire_counters(self, preferences: UserPreferences, counters: PreferenceCounters, window_start):
+        """Subtract events between counts_since and window_start from the counters"""
+        expired_events = UserBehavior.objects.filter(
+            user_id=preferences.user_id,
+            timestamp__gte=preferences.counts_since,
+            timestamp__lt=window_start
+        ).order_by().values('category', 'artist_id', 'price_range').annotate(count=Count('id'))
+        
+        for event in expired_events:
+            counters.discard(event['category'], event['artist_id'], event['price_range'], event['count'])
+        
+        preferences.counts_since = window_start
     
-    def _generate_recommendations(self, user_id: int, limit: int) -> List[Dict[str, Any]]:
-        """Generate recommendations using hybrid approach"""
+    def _generate_recommendations(self, user_id: int, limit: int, trace: Optional[PipelineTrace] = None) -> List[Dict[str, Any]]:
+        """Generate recommendations using hybrid approach, one timed stage at a time"""
+        trace = trace if trace is not None else PipelineTrace()
         
         # Get user preferences
-        try:
-            preferences = UserPreferences.objects.get(user_id=user_id)
-        except UserPreferences.DoesNotExist:
-            # Return popular items for new users
-            return self._get_popular_recommendations(limit)
+        with trace.stage('preferences'):
+            preferences = UserPreferences.objects.filter(user_id=user_id).first()
+        
+        if preferences is None:
+            return self._generate_cold_start_recommendations(limit, trace)
         
         # Content-based filtering
-        content_recs = self._content_based_filtering(user_id, preferences, limit * 2)
+        with trace.stage('content_based') as stage:
+            content_recs = self._content_based_filtering(user_id, preferences, limit * 2)
+            stage.candidates_out = len(content_recs)
         
         # Collaborative filtering
-        collab_recs = self._collaborative_filtering(user_id, limit * 2)
+        with trace.stage('collaborative') as stage:
+            collab_recs = self._collaborative_filtering(user_id, limit * 2)
+            stage.candidates_out = len(collab_recs)
+        
+        # Load metadata for every candidate at once and drop unavailable artworks
+        with trace.stage('hydration', candidates_in=len(content_recs) + len(collab_recs)) as stage:
+            candidates = self.artwork_hydrator.hydrate(content_recs + collab_recs)
+            content_recs = [rec for rec in candidates if rec['algorithm'] == 'content-based']
+            collab_recs = [rec for rec in candidates if rec['algorithm'] != 'content-based']
+            stage.candidates_out = len(candidates)
         
         # Combine and rank
-        combined_recs = self._combine_recommendations(content_recs, collab_recs, limit)
+        with trace.stage('combine', candidates_in=len(candidates)) as stage:
+            combined_recs = self._combine_recommendations(content_recs, collab_recs, limit)
+            stage.candidates_out = len(combined_recs)
         
         # Add business rules
-        final_recs = self._apply_business_rules(combined_recs, user_id)
+        with trace.stage('business_rules', candidates_in=len(combined_recs)) as stage:
+            final_recs = self._apply_business_rules(combined_recs, user_id)[:limit]
+            stage.candidates_out = len(final_recs)
         
-        return final_recs[:limit]
+        return final_recs
     
-    def _content_based_filtering(self, user_id: int, preferences: UserPreferences, limit: int) -> List[Dict[str, Any]]:
-        """Content-based filtering based on user preferences"""
-        recommendations = []
+    def _generate_cold_start_recommendations(self, limit: int, trace: PipelineTrace) -> List[Dict[str, Any]]:
+        """Popular items for users without preferences, with headroom for unavailable ones"""
+        with trace.stage('popularity') as stage:
+            popular_recs = self._get_popular_recommendations(limit * 2)
+            stage.candidates_out = len(popular_recs)
+        with trace.stage('hydration', candidates_in=len(popular_recs)) as stage:
+            popular_recs = self.artwork_hydrator.hydrate(popular_recs)[:limit]
+            stage.candidates_out = len(popular_recs)
+        return popular_recs
+    
+    def _generate_content_recommendations(self, user_id: int, limit: int, trace: Optional[PipelineTrace] = None) -> List[Dict[str, Any]]:
+        """Content-based only: skips collaborative filtering for lower latency"""
+        trace = trace if trace is not None else PipelineTrace()
         
-        # This would typically query your artwork database
-        # For now, we'll simulate with mock data
-        mock_artworks = self._get_mock_artworks()
+        with trace.stage('preferences'):
+            preferences = UserPreferences.objects.filter(user_id=user_id).first()
         
-        for artwork in mock_artworks:
-            score = 0
-            reasons = []
-            
-            # Category match
-            if artwork['category'] in preferences.preferred_categories:
-                score += 40
-                reasons.append(f"Similar to your interest in {artwork['category']}")
-            
-            # Price range match
-            if artwork['price_range'] == preferences.preferred_price_range:
-                score += 30
-                reasons.append(f"Matches your preferred price range")
-            
-            # Artist preference
-            if artwork['artist_id'] in preferences.preferred_artists:
-                score += 20
-                reasons.append(f"From artists you like")
-            
-            # Popularity boost
-            score += artwork['popularity_score']
-            
-            if score > 50:  # Threshold for recommendation
-                recommendations.append({
-                    'artwork_id': artwork['id'],
-                    'title': artwork['title'],
-                    'artist_name': artwork['artist_name'],
-                    'category': artwork['category'],
-                    'price': artwork['price'],
-                    'image_url': artwork['image_url'],
-                    'match_score': min(score, 95),  # Cap at 95%
-                    'reasons': reasons[:3],  # Top 3 reasons
-                    'algorithm': 'content-based'
-                })
+        if preferences is None:
+            # Served by the v1 cold-start path, so tag them as v1
+            recommendations = self._generate_cold_start_recommendations(limit, trace)
+            for rec in recommendations:
+                rec['algorithm_version'] = self.base_algorithm_version
+            return recommendations
+        
+        with trace.stage('content_based') as stage:
+            content_recs = self._content_based_filtering(user_id, preferences, limit * 2)
+            stage.candidates_out = len(content_recs)
         
-        return sorted(recommendations, key=lambda x: x['match_score'], reverse=True)[:limit]
+        with trace.stage('hydration', candidates_in=len(content_recs)) as stage:
+            candidates = self.artwork_hydrator.hydrate(content_recs)
+            stage.candidates_out = len(candidates)
+        
+        with trace.stage('business_rules', candidates_in=len(candidates)) as stage:
+            final_recs = self._apply_business_rules(candidates, user_id)[:limit]
+            stage.candidates_out = len(final_recs)
+        
+        return final_recs
+    
+    def _content_based_filtering(self, user_id: int, preferences: UserPreferences, limit: int) -> List[Dict[str, Any]]:
+        """Content-based filtering based on user preferences"""
+        # One vectorized pass over the active catalog
+        return artwork_features.score(
+            preferences.preferred_categories,
+            preferences.preferred_price_range,
+            preferences.preferred_artists,
+            limit
+        )
     
     def _collaborative_filtering(self, user_id: int, limit: int) -> List[Dict[str, Any]]:
         """Collaborative filtering based on similar users"""
+        # Prefer the trained factor model when it knows this user
+        model = self.factor_models.get()
+        if model is not None and user_id in model.user_row:
+            return self._factorization_recommendations(model, user_id, limit)
+        
         # Get users with similar behavior
         similar_users = self._find_similar_users(user_id)
         
@@ -190,44 +422,28 @@ class RecommendationEngine:
         
         return recommendations[:limit]
     
+    def _factorization_recommendations(self, model: FactorModel, user_id: int, limit: int) -> List[Dict[str, Any]]:
+        """Score every trained artwork for the user with one matrix-vector product"""
+        recommendations = []
+        for artwork_id, score in model.recommend(user_id, limit):
+            recommendations.append({
+                'artwork_id': artwork_id,
+                # Predicted preference is roughly 0-1; map it onto 50-95
+                'match_score': round(50 + 45 * min(max(score, 0.0), 1.0), 1),
+                'reasons': ['Liked by users with similar tastes'],
+                'algorithm': 'matrix-factorization',
+                'model_version': model.version
+            })
+        
+        return recommendations
+    
     def _find_similar_users(self, user_id: int) -> List[int]:
         """Find users with similar behavior patterns"""
-        # Get user's recent behaviors
-        user_behaviors = UserBehavior.objects.filter(
-            user_id=user_id,
-            timestamp__gte=timezone.now() - timedelta(days=30)
-        )
-        
-        user_categories = set(behavior.category for behavior in user_behaviors if behavior.category)
-        user_artists = set(behavior.artist_id for behavior in user_behaviors if behavior.artist_id)
-        
-        if not user_categories and not user_artists:
-            return []
-        
-        # Find users with overlapping preferences
-        similar_users = []
-        all_users = User.objects.exclude(id=user_id)
-        
-        for other_user in all_users:
-            other_behaviors = UserBehavior.objects.filter(
-                user_id=other_user.id,
-                timestamp__gte=timezone.now() - timedelta(days=30)
-            )
-            
-            other_categories = set(behavior.category for behavior in other_behaviors if behavior.category)
-            other_artists = set(behavior.artist_id for behavior in other_behaviors if behavior.artist_id)
-            
-            # Calculate similarity
-            category_overlap = len(user_categories & other_categories) / max(len(user_categories | other_categories), 1)
-            artist_overlap = len(user_artists & other_artists) / max(len(user_artists | other_artists), 1)
-            
-            similarity = (category_overlap + artist_overlap) / 2
-            
-            if similarity > 0.3:  # 30% similarity threshold
-                similar_users.append((other_user.id, similarity))
+        # Only users sharing a category or artist with this user are scored
+        similar_users = self.similarity_index.similar_users(user_id, threshold=0.3)
         
         # Return top similar users
-        return [user_id for user_id, similarity in sorted(similar_users, key=lambda x: x[1], reverse=True)]
+        return [user_id for user_id, similarity in similar_users]
     
     def _combine_recommendations(self, content_recs: List[Dict], collab_recs: List[Dict], limit: int) -> List[Dict]:
         """Combine content-based and collaborative recommendations"""
@@ -279,13 +495,20 @@ class RecommendationEngine:
     
     def _get_popular_recommendations(self, limit: int) -> List[Dict[str, Any]]:
         """Get popular items for new users"""
-        # Get most liked/purchased items
-        from django.db import models
-        popular_items = UserBehavior.objects.filter(
-            action_type__in=['like', 'purchase']
-        ).values('artwork_id').annotate(
-            popularity=models.Count('artwork_id')
-        ).order_by('-popularity')[:limit]
+        # Single indexed read of the time-decayed popularity table
+        popular_items = [
+            {'artwork_id': artwork_id, 'popularity': score}
+            for artwork_id, score in top_popular(limit)
+        ]
+        
+        if not popular_items:
+            # Table not built yet, fall back to counting raw likes/purchases
+            from django.db import models
+            popular_items = UserBehavior.objects.filter(
+                action_type__in=['like', 'purchase']
+            ).values('artwork_id').annotate(
+                popularity=models.Count('artwork_id')
+            ).order_by('-popularity')[:limit]
         
         # Convert to recommendation format
         recommendations = []
@@ -300,58 +523,14 @@ class RecommendationEngine:
         
         return recommendations
     
-    def _get_mock_artworks(self) -> List[Dict[str, Any]]:
-        """Mock artwork data for demonstration"""
-        return [
-            {
-                'id': 1,
-                'title': 'Abstract Harmony',
-                'artist_name': 'Priya Sharma',
-                'artist_id': 1,
-                'category': 'abstract',
-                'price': 15000,
-                'price_range': 'high',
-                'image_url': '/sample/abstract1.jpg',
-                'popularity_score': 15
-            },
-            {
-                'id': 2,
-                'title': 'Ocean Waves',
-                'artist_name': 'Rahul Mehta',
-                'artist_id': 2,
-                'category': 'landscape',
-                'price': 8000,
-                'price_range': 'medium',
-                'image_url': '/sample/landscape1.jpg',
-                'popularity_score': 12
-            },
-            # Add more mock artworks...
-        ]
-    
     def _get_cached_recommendations(self, user_id: int) -> List[Dict[str, Any]]:
         """Get cached recommendations if still valid"""
-        try:
-            cache = RecommendationCache.objects.get(
-                user_id=user_id,
-                expires_at__gt=timezone.now()
-            )
-            return cache.recommendations
-        except RecommendationCache.DoesNotExist:
-            return None
+        return self.recommendation_cache.get(user_id)
     
     def _cache_recommendations(self, user_id: int, recommendations: List[Dict[str, Any]]):
         """Cache recommendations for performance"""
         try:
-            # Remove old cache
-            RecommendationCache.objects.filter(user_id=user_id).delete()
-            
-            # Create new cache
-            RecommendationCache.objects.create(
-                user_id=user_id,
-                recommendations=recommendations,
-                algorithm_version=self.algorithm_version,
-                expires_at=timezone.now() + self.cache_duration
-            )
+            self.recommendation_cache.set(user_id, recommendations, self.algorithm_version_for(recommendations))
         except Exception as e:
             # If caching fails, just log it and continue
             print(f"Failed to cache recommendations: {e}")
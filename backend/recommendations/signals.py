@@ -0,0 +1,27 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from artworks.counters import counters_flushed
+from artworks.models import Artwork
+
+from .features import artwork_features
+from .hydration import artwork_hydrator
+
+
+@receiver(post_save, sender=Artwork)
+def update_artwork_features(sender, instance, update_fields=None, **kwargs):
+    """Keep the content feature matrix in step with saved artworks"""
+    artwork_features.update(instance, update_fields)
+    if not update_fields or not set(update_fields) <= {'views', 'likes'}:
+        artwork_hydrator.invalidate(instance.id)
+
+
+@receiver(post_delete, sender=Artwork)
+def remove_artwork_features(sender, instance, **kwargs):
+    artwork_features.remove(instance.id)
+    artwork_hydrator.invalidate(instance.id)
+
+
+@receiver(counters_flushed, sender=Artwork)
+def update_artwork_counters(sender, counts, **kwargs):
+    artwork_features.update_counters(counts)
@@ -0,0 +1,145 @@
+import re
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from django.db import transaction
+from django.utils import timezone
+
+from .covisitation import TopKCounter
+from .models import TrendingSearchCheckpoint
+from .refresh import BackgroundRefresher
+
+# Blank category key for the global ranking
+GLOBAL = ''
+
+
+def normalize_query(query: Optional[str]) -> str:
+    """Lowercase and collapse whitespace so variants of a query count together"""
+    return re.sub(r'\s+', ' ', (query or '').strip().lower())[:200]
+
+
+class TrendingSearches:
+    """Streaming heavy hitters over search queries, globally and per category
+
+    Each worker counts new searches in Space-Saving counters of fixed
+    capacity and a background thread, every checkpoint_interval seconds and
+    as soon as a new window starts, merges them into the
+    TrendingSearchCheckpoint row for the current window, keeping the
+    capacity heaviest queries. Counts whose merge fails are kept for the
+    next checkpoint. Rankings combine the merged checkpoint with
+    the worker's pending counts, plus the previous window faded out
+    linearly, so trends do not reset at a window boundary.
+    """
+
+    def __init__(self, capacity: int = 200, window: timedelta = timedelta(hours=1),
+                 checkpoint_interval: float = 60, windows_kept: int = 48):
+        self.capacity = capacity
+        self.window = window
+        self.checkpoint_interval = checkpoint_interval
+        self.windows_kept = windows_kept
+        self._lock = threading.RLock()
+        self._window_start = None
+        self._pending = {}
+        self._snapshot = {}
+        self._previous = {}
+        self._refresher = BackgroundRefresher(self.checkpoint, checkpoint_interval, name='trending-search-checkpointer')
+
+    def _window_for(self, moment: datetime) -> datetime:
+        epoch = int(moment.timestamp())
+        size = int(self.window.total_seconds())
+        return datetime.fromtimestamp(epoch - epoch % size, tz=moment.tzinfo)
+
+    def add(self, query: Optional[str], category: Optional[str] = None):
+        """Count one search event"""
+        query = normalize_query(query)
+        if not query:
+            return
+
+        self._ensure_checkpointing()
+        with self._lock:
+            for key in (GLOBAL, category) if category else (GLOBAL,):
+                self._count(key, query)
+
+    def _count(self, key: str, query: str, weight: float = 1.0):
+        counter = self._pending.get(key)
+        if counter is None:
+            counter = self._pending[key] = TopKCounter(self.capacity)
+        counter.add(query, weight)
+
+    def _ensure_checkpointing(self):
+        self._refresher.ensure_started()
+        if self._window_start is not None and self._window_for(timezone.now()) != self._window_start:
+            # Counts from here on belong to the new window
+            self._refresher.request()
+
+    def checkpoint(self):
+        """Merge pending counts into the database and reload the merged windows"""
+        now = timezone.now()
+        with self._lock:
+            window_start = self._window_start
+            # Before the first load there is no window to merge into yet
+            pending = self._pending if window_start is not None else {}
+            if window_start is not None:
+                self._pending = {}
+
+        if pending:
+            try:
+                with transaction.atomic():
+                    for category in sorted(pending):
+                        row, _ = TrendingSearchCheckpoint.objects.select_for_update().get_or_create(
+                            window_start=window_start, category=category
+                        )
+                        merged = Counter(dict(row.counts))
+                        merged.update(pending[category].counts)
+                        row.counts = [[query, count] for query, count in merged.most_common(self.capacity)]
+                        row.save()
+            except Exception:
+                # Put the counts back so the next checkpoint merges them
+                with self._lock:
+                    for category, counter in pending.items():
+                        for query, count in counter.counts.items():
+                            self._count(category, query, count)
+                raise
+
+        current = self._window_for(now)
+        previous = current - self.window
+        snapshot = {}
+        previous_snapshot = {}
+        for row in TrendingSearchCheckpoint.objects.filter(window_start__in=[current, previous]):
+            target = snapshot if row.window_start == current else previous_snapshot
+            target[row.category] = dict(row.counts)
+
+        TrendingSearchCheckpoint.objects.filter(window_start__lt=current - self.window * self.windows_kept).delete()
+
+        with self._lock:
+            self._window_start = current
+            self._snapshot = snapshot
+            self._previous = previous_snapshot
+
+    def top(self, limit: int = 10, category: Optional[str] = None, prefix: str = '') -> List[Dict[str, object]]:
+        """Heaviest queries right now, optionally only those starting with prefix"""
+        self._ensure_checkpointing()
+        key = category or GLOBAL
+        prefix = normalize_query(prefix)
+
+        with self._lock:
+            # Fade the previous window out over the current one
+            if self._window_start is not None:
+                fade = max(0.0, 1.0 - (timezone.now() - self._window_start) / self.window)
+            else:
+                fade = 0.0
+            scores = Counter(self._snapshot.get(key, {}))
+            pending = self._pending.get(key)
+            if pending is not None:
+                scores.update(pending.counts)
+            for query, count in self._previous.get(key, {}).items():
+                scores[query] += count * fade
+
+        ranked = [
+            {'query': query, 'count': round(count, 2)}
+            for query, count in scores.most_common()
+            if query.startswith(prefix)
+        ]
+        return ranked[:limit]
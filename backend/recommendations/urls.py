@@ -5,4 +5,8 @@ urlpatterns = [
     path('track-behavior/', views.TrackBehaviorView.as_view(), name='track_behavior'),
     path('get-recommendations/', views.GetRecommendationsView.as_view(), name='get_recommendations'),
     path('user-preferences/', views.GetUserPreferencesView.as_view(), name='user_preferences'),
+    path('session/', views.SessionRecommendationsView.as_view(), name='session_recommendations'),
+    path('trending-searches/', views.TrendingSearchesView.as_view(), name='trending_searches'),
+    path('similar/<int:artwork_id>/', views.SimilarArtworksView.as_view(), name='similar_artworks'),
+    path('metrics/', views.RecommendationMetricsView.as_view(), name='recommendation_metrics'),
 ]
@@ -0,0 +1,192 @@
+import hashlib
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+# generate(user_id, limit, trace) -> recommendations
+Generator = Callable[..., List[Dict[str, Any]]]
+
+
+class VersionStats:
+    """Recent latencies and overlap with the primary version for one algorithm version"""
+
+    def __init__(self, max_samples: int = 1000):
+        self._lock = threading.Lock()
+        self.latencies_ms = deque(maxlen=max_samples)
+        self.overlaps = deque(maxlen=max_samples)
+        self.served = 0
+        self.shadowed = 0
+        self.errors = 0
+
+    def record(self, duration_ms: float, shadow: bool = False, overlap: Optional[float] = None):
+        with self._lock:
+            self.latencies_ms.append(duration_ms)
+            if shadow:
+                self.shadowed += 1
+            else:
+                self.served += 1
+            if overlap is not None:
+                self.overlaps.append(overlap)
+
+    def record_error(self):
+        with self._lock:
+            self.errors += 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            latencies = np.array(self.latencies_ms)
+            overlaps = list(self.overlaps)
+            stats = {
+                'served': self.served,
+                'shadowed': self.shadowed,
+                'errors': self.errors,
+                'samples': len(latencies),
+            }
+        if len(latencies):
+            p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+            stats.update(p50_ms=round(float(p50), 3), p95_ms=round(float(p95), 3), p99_ms=round(float(p99), 3))
+        if overlaps:
+            stats['mean_overlap'] = round(sum(overlaps) / len(overlaps), 4)
+        return stats
+
+
+def overlap_at_k(primary: List[Dict[str, Any]], candidate: List[Dict[str, Any]]) -> float:
+    """Share of the primary's artworks that the candidate also returned in its top k"""
+    k = len(primary)
+    if k == 0:
+        return 1.0 if not candidate else 0.0
+    primary_ids = {rec['artwork_id'] for rec in primary}
+    candidate_ids = {rec['artwork_id'] for rec in candidate[:k]}
+    return len(primary_ids & candidate_ids) / k
+
+
+class VersionRouter:
+    """Registered algorithm versions, hash-based user assignment and shadow scoring
+
+    Users map to a version through a salted hash of their id, so the same
+    user always sees the same version for a given weights table. Shadow
+    versions are scored for a sampled share of requests, on a small thread
+    pool when shadow_async is set, and compared with what was actually
+    served; their output is only measured, never returned.
+    """
+
+    def __init__(self, weights: Dict[str, float], default: str = 'v1', salt: str = 'recommendations',
+                 shadows: Optional[Dict[str, float]] = None, shadow_async: bool = True,
+                 shadow_max_pending: int = 8, shadow_workers: int = 2):
+        self.weights = weights
+        self.default = default
+        self.salt = salt
+        self.shadows = shadows or {}
+        self.shadow_async = shadow_async
+        self.shadow_max_pending = shadow_max_pending
+        self.shadow_workers = shadow_workers
+        self._versions = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+        self._pending = 0
+        self.shadow_skipped = 0
+
+    def register(self, name: str, generate: Generator):
+        self._versions[name] = generate
+        self._stats[name] = VersionStats()
+
+    def assign(self, user_id: int) -> str:
+        """Deterministically pick a registered version for this user"""
+        weights = [(name, weight) for name, weight in self.weights.items() if name in self._versions and weight > 0]
+        if not weights:
+            return self.default
+
+        digest = hashlib.sha256(f'{self.salt}:{user_id}'.encode()).digest()
+        point = int.from_bytes(digest[:8], 'big') / 2 ** 64 * sum(weight for _, weight in weights)
+        for name, weight in weights:
+            point -= weight
+            if point < 0:
+                return name
+        return weights[-1][0]
+
+    def generate(self, version: str, user_id: int, limit: int, trace=None) -> List[Dict[str, Any]]:
+        """Run one version for the user, timing it and tagging its output
+
+        A version that falls back to another one tags its results itself,
+        and that tag is kept.
+        """
+        started = time.perf_counter()
+        try:
+            recommendations = self._versions[version](user_id, limit, trace)
+        except Exception:
+            self._stats[version].record_error()
+            raise
+        self._stats[version].record((time.perf_counter() - started) * 1000)
+
+        for rec in recommendations:
+            rec.setdefault('algorithm_version', version)
+        return recommendations
+
+    def shadow(self, user_id: int, limit: int, served: List[Dict[str, Any]]):
+        """Score sampled shadow versions against what the user was served"""
+        primary = self.assign(user_id)
+        for version, sample_rate in self.shadows.items():
+            if version == primary or version not in self._versions or random.random() >= sample_rate:
+                continue
+            if not self.shadow_async:
+                self._run_shadow(version, user_id, limit, served)
+                continue
+
+            with self._lock:
+                if self._pending >= self.shadow_max_pending:
+                    # Shed shadow work rather than queue it behind live traffic
+                    self.shadow_skipped += 1
+                    continue
+                self._pending += 1
+            self._get_executor().submit(self._run_shadow_async, version, user_id, limit, served)
+
+    def _run_shadow_async(self, version: str, user_id: int, limit: int, served: List[Dict[str, Any]]):
+        try:
+            close_old_connections()
+            self._run_shadow(version, user_id, limit, served)
+        finally:
+            close_old_connections()
+            with self._lock:
+                self._pending -= 1
+
+    def _run_shadow(self, version: str, user_id: int, limit: int, served: List[Dict[str, Any]]):
+        started = time.perf_counter()
+        try:
+            candidate = self._versions[version](user_id, limit, None)
+        except Exception:
+            logger.exception('Shadow version %s failed for user %s', version, user_id)
+            self._stats[version].record_error()
+            return
+        self._stats[version].record(
+            (time.perf_counter() - started) * 1000, shadow=True, overlap=overlap_at_k(served[:limit], candidate)
+        )
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            # A pool created before a fork has no threads in the child worker
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.shadow_workers, thread_name_prefix='recommendation-shadow'
+                )
+                self._pid = os.getpid()
+            return self._executor
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'weights': self.weights,
+            'shadows': self.shadows,
+            'shadow_skipped': self.shadow_skipped,
+            'versions': {name: stats.as_dict() for name, stats in self._stats.items()},
+        }
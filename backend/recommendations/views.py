@@ -1,23 +1,86 @@
-from django.http import JsonResponse
+from django.http import HttpResponse, HttpResponseNotModified, JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.contrib.auth.decorators import login_required
 from django.utils.decorators import method_decorator
 from django.views import View
+import hashlib
 import json
+from django.core.exceptions import ValidationError
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags, quote_etag
+from artworks.counters import artwork_counters
+from .buffer import BehaviorEventBuffer, BufferFull
+from .cache import LRUCache
+from .conf import get_setting
+from .feed import GlobalFeed
+from .instrumentation import PipelineTrace
+from .models import ArtworkSimilarity, UserBehavior
 from .services import RecommendationEngine
 
 # Initialize recommendation engine
 recommendation_engine = RecommendationEngine()
 
+# Write-behind queue used when RECOMMENDATIONS['BUFFERED_TRACKING'] is on
+behavior_buffer = BehaviorEventBuffer(
+    recommendation_engine.track_user_behaviors,
+    max_size=get_setting('EVENT_BUFFER_MAX_SIZE'),
+    flush_size=get_setting('EVENT_BUFFER_FLUSH_SIZE'),
+    flush_interval=get_setting('EVENT_BUFFER_FLUSH_INTERVAL'),
+    enqueue_timeout=get_setting('EVENT_BUFFER_ENQUEUE_TIMEOUT'),
+)
+
+# Precomputed feed for logged-out visitors
+global_feed = GlobalFeed(
+    size=get_setting('GLOBAL_FEED_SIZE'),
+    refresh_interval=get_setting('GLOBAL_FEED_REFRESH_INTERVAL'),
+)
+
+BEHAVIOR_FIELDS = (
+    'action_type', 'artwork_id', 'artist_id', 'category',
+    'search_query', 'price_range', 'session_id',
+)
+
+
+def validate_behavior_events(user_id, raw_events):
+    """Validate raw event dicts against UserBehavior, returning (events, errors)"""
+    events = []
+    errors = {}
+    
+    for index, raw_event in enumerate(raw_events):
+        if not isinstance(raw_event, dict):
+            errors[index] = {'__all__': ['Event must be an object']}
+            continue
+        
+        behavior = UserBehavior(user_id=user_id, **{field: raw_event.get(field) for field in BEHAVIOR_FIELDS})
+        try:
+            behavior.full_clean(exclude=['user'])
+        except ValidationError as e:
+            errors[index] = e.message_dict
+            continue
+        
+        # full_clean() leaves the coerced values on the instance
+        events.append({'user_id': user_id, **{field: getattr(behavior, field) for field in BEHAVIOR_FIELDS}})
+    
+    return events, errors
+
 @method_decorator(csrf_exempt, name='dispatch')
 class TrackBehaviorView(View):
     """Track user behavior for AI learning"""
     
+    # Upper bound on events accepted in one batch request
+    max_batch_events = 100
+    
     def post(self, request):
         try:
             data = json.loads(request.body)
             
+            if isinstance(data, dict) and 'events' in data:
+                return self._post_batch(request, data['events'])
+            
+            if get_setting('BUFFERED_TRACKING'):
+                return self._post_batch(request, [data])
+            
             # Extract data
             action_type = data.get('action_type')
             artwork_id = data.get('artwork_id')
@@ -49,6 +112,64 @@ class TrackBehaviorView(View):
                 'success': False,
                 'error': str(e)
             }, status=400)
+    
+    def _post_batch(self, request, raw_events):
+        """Validate a list of events together and store them in one bulk insert"""
+        if not request.user.is_authenticated:
+            return JsonResponse({
+                'success': False,
+                'error': 'Authentication required'
+            }, status=401)
+        
+        if not isinstance(raw_events, list) or not raw_events:
+            return JsonResponse({
+                'success': False,
+                'error': 'events must be a non-empty list'
+            }, status=400)
+        
+        if len(raw_events) > self.max_batch_events:
+            return JsonResponse({
+                'success': False,
+                'error': f'At most {self.max_batch_events} events can be sent per batch'
+            }, status=400)
+        
+        events, errors = validate_behavior_events(request.user.id, raw_events)
+        if errors:
+            # Reject the whole batch so the client can resend it as one unit
+            return JsonResponse({
+                'success': False,
+                'error': 'Invalid events',
+                'errors': errors
+            }, status=400)
+        
+        if get_setting('BUFFERED_TRACKING'):
+            return self._enqueue(events)
+        
+        recommendation_engine.track_user_behaviors(events)
+        
+        return JsonResponse({
+            'success': True,
+            'message': 'Behavior tracked successfully',
+            'tracked_count': len(events)
+        })
+
+    def _enqueue(self, events):
+        """Hand validated events to the write-behind buffer and return 202"""
+        try:
+            behavior_buffer.put(events)
+        except BufferFull as e:
+            response = JsonResponse({
+                'success': False,
+                'error': str(e)
+            }, status=503)
+            response['Retry-After'] = '1'
+            return response
+        
+        return JsonResponse({
+            'success': True,
+            'message': 'Behavior queued for tracking',
+            'tracked_count': len(events)
+        }, status=202)
 
 @method_decorator(csrf_exempt, name='dispatch')
 class GetRecommendationsView(View):
@@ -60,95 +181,38 @@ class GetRecommendationsView(View):
             
             # Check if user is authenticated
             if not request.user.is_authenticated:
-                # Return mock data for unauthenticated users
-                mock_recommendations = [
-                    {
-                        'artwork_id': 1,
-                        'title': 'Abstract Art Vibes',
-                        'artist_name': 'Mira Sen',
-                        'category': 'abstract',
-                        'price': 15000,
-                        'image_url': 'https://images.unsplash.com/photo-1541961017774-22349e4a1262?w=500&h=500&fit=crop&crop=center',
-                        'match_score': 85,
-                        'reasons': ['Similar to your interest in abstract art'],
-                        'algorithm': 'content-based'
-                    },
-                    {
-                        'artwork_id': 2,
-                        'title': "Nature's Flow",
-                        'artist_name': 'Arjun Desai',
-                        'category': 'landscape',
-                        'price': 12000,
-                        'image_url': 'https://images.unsplash.com/photo-1506905925346-21bda4d32df4?w=500&h=500&fit=crop&crop=center',
-                        'match_score': 78,
-                        'reasons': ['From artists you like'],
-                        'algorithm': 'collaborative'
-                    },
-                    {
-                        'artwork_id': 3,
-                        'title': 'Digital Dreamscape',
-                        'artist_name': 'Ananya Rao',
-                        'category': 'digital',
-                        'price': 8000,
-                        'image_url': 'https://images.unsplash.com/photo-1557683316-973673baf926?w=500&h=500&fit=crop&crop=center',
-                        'match_score': 92,
-                        'reasons': ['Popular choice among buyers'],
-                        'algorithm': 'popularity'
-                    },
-                    {
-                        'artwork_id': 4,
-                        'title': 'Urban Canvas',
-                        'artist_name': 'Priya Sharma',
-                        'category': 'street',
-                        'price': 9500,
-                        'image_url': 'https://images.unsplash.com/photo-1513475382585-d06e58bcb0e0?w=500&h=500&fit=crop&crop=center',
-                        'match_score': 88,
-                        'reasons': ['Trending in your area'],
-                        'algorithm': 'content-based'
-                    },
-                    {
-                        'artwork_id': 5,
-                        'title': 'Ocean Depths',
-                        'artist_name': 'Rajesh Kumar',
-                        'category': 'abstract',
-                        'price': 18000,
-                        'image_url': 'https://images.unsplash.com/photo-1578662996442-48f60103fc96?w=500&h=500&fit=crop&crop=center',
-                        'match_score': 76,
-                        'reasons': ['Similar to your liked artworks'],
-                        'algorithm': 'collaborative'
-                    },
-                    {
-                        'artwork_id': 6,
-                        'title': 'Geometric Harmony',
-                        'artist_name': 'Sneha Patel',
-                        'category': 'geometric',
-                        'price': 11000,
-                        'image_url': 'https://images.unsplash.com/photo-1558618666-fcd25c85cd64?w=500&h=500&fit=crop&crop=center',
-                        'match_score': 91,
-                        'reasons': ['Highly rated by similar users'],
-                        'algorithm': 'popularity'
-                    }
-                ]
-                
-                return JsonResponse({
-                    'success': True,
-                    'recommendations': mock_recommendations[:limit],
-                    'algorithm_version': 'mock-v1',
-                    'total_count': len(mock_recommendations[:limit])
-                })
+                # Anonymous visitors share a feed served from memory
+                body, etag = global_feed.payload(request.GET.get('category'), limit)
+                if etag in parse_etags(request.headers.get('If-None-Match', '')):
+                    response = HttpResponseNotModified()
+                else:
+                    response = HttpResponse(body, content_type='application/json')
+                response['ETag'] = etag
+                patch_cache_control(response, public=True, max_age=get_setting('GLOBAL_FEED_MAX_AGE'))
+                # The same URL is personalized once a session cookie is sent
+                patch_vary_headers(response, ['Cookie'])
+                return response
+            
+            # Staff can ask for per-stage timings with ?debug=1
+            trace = PipelineTrace()
             
             # Get recommendations for authenticated users
             recommendations = recommendation_engine.get_recommendations(
                 user_id=request.user.id,
-                limit=limit
+                limit=limit,
+                trace=trace
             )
             
-            return JsonResponse({
+            response = {
                 'success': True,
                 'recommendations': recommendations,
-                'algorithm_version': recommendation_engine.algorithm_version,
+                'algorithm_version': recommendation_engine.algorithm_version_for(recommendations),
                 'total_count': len(recommendations)
-            })
+            }
+            if request.user.is_staff and request.GET.get('debug') == '1':
+                response['debug'] = {'pipeline': trace.as_dict()}
+            
+            return JsonResponse(response)
             
         except Exception as e:
             return JsonResponse({
@@ -164,41 +228,34 @@ class GetUserPreferencesView(View):
         try:
             from .models import UserPreferences
             
-            preferences = UserPreferences.objects.get(user_id=request.user.id)
-            
-            # Get behavior insights
-            from .models import UserBehavior
-            from django.utils import timezone
-            from datetime import timedelta
-            
-            thirty_days_ago = timezone.now() - timedelta(days=30)
-            recent_behaviors = UserBehavior.objects.filter(
-                user_id=request.user.id,
-                timestamp__gte=thirty_days_ago
-            )
+            preferences = UserPreferences.objects.filter(user_id=request.user.id).first()
             
-            insights = {
-                'total_views': recent_behaviors.filter(action_type='view').count(),
-                'total_likes': recent_behaviors.filter(action_type='like').count(),
-                'total_purchases': recent_behaviors.filter(action_type='purchase').count(),
-                'favorite_categories': preferences.preferred_categories,
-                'preferred_price_range': preferences.preferred_price_range,
-                'followed_artists_count': len(preferences.preferred_artists)
-            }
-            
-            return JsonResponse({
-                'success': True,
-                'preferences': {
-                    'preferred_categories': preferences.preferred_categories,
-                    'preferred_price_range': preferences.preferred_price_range,
-                    'preferred_artists': preferences.preferred_artists,
-                    'last_updated': preferences.last_updated.isoformat()
-                },
-                'insights': insights
-            })
+            # Every tracked event saves the preferences, and counts may lag
+            # events ageing out for one insight epoch anyway, so the ETag is
+            # known before the counts are loaded and a 304 skips loading them
+            version = ':'.join([
+                str(request.user.id),
+                preferences.last_updated.isoformat() if preferences is not None else '',
+                str(recommendation_engine.behavior_insights.epoch()),
+            ])
+            etag = quote_etag(hashlib.md5(version.encode()).hexdigest())
+            if etag in parse_etags(request.headers.get('If-None-Match', '')):
+                response = HttpResponseNotModified()
+            else:
+                response = JsonResponse(self._payload(request.user.id, preferences))
+            response['ETag'] = etag
+            patch_cache_control(response, private=True, no_cache=True)
+            return response
             
-        except UserPreferences.DoesNotExist:
+        except Exception as e:
             return JsonResponse({
+                'success': False,
+                'error': str(e)
+            }, status=500)
+    
+    def _payload(self, user_id, preferences):
+        if preferences is None:
+            return {
                 'success': True,
                 'preferences': None,
                 'insights': {
@@ -209,9 +266,150 @@ class GetUserPreferencesView(View):
                     'preferred_price_range': 'medium',
                     'followed_artists_count': 0
                 }
+            }
+        
+        # Window counts come from the per-user insight cache
+        counts = recommendation_engine.behavior_insights.get(user_id)
+        
+        insights = {
+            **counts,
+            'favorite_categories': preferences.preferred_categories,
+            'preferred_price_range': preferences.preferred_price_range,
+            'followed_artists_count': len(preferences.preferred_artists)
+        }
+        
+        return {
+            'success': True,
+            'preferences': {
+                'preferred_categories': preferences.preferred_categories,
+                'preferred_price_range': preferences.preferred_price_range,
+                'preferred_artists': preferences.preferred_artists,
+                'last_updated': preferences.last_updated.isoformat()
+            },
+            'insights': insights
+        }
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class SimilarArtworksView(View):
+    """Artworks that people who interacted with this one also liked"""
+    
+    # Neighbour lists only change when the offline index is rebuilt
+    neighbour_cache = LRUCache(max_entries=5000, ttl=300)
+    
+    def get(self, request, artwork_id):
+        try:
+            limit = int(request.GET.get('limit', 12))
+            
+            neighbours = self.neighbour_cache.get(artwork_id)
+            if neighbours is None:
+                neighbours = ArtworkSimilarity.objects.filter(
+                    artwork_id=artwork_id
+                ).values_list('neighbours', flat=True).first() or []
+                self.neighbour_cache.set(artwork_id, neighbours)
+            
+            return JsonResponse({
+                'success': True,
+                'artwork_id': artwork_id,
+                'similar_artworks': neighbours[:limit],
+                'total_count': len(neighbours[:limit])
             })
+            
         except Exception as e:
             return JsonResponse({
                 'success': False,
                 'error': str(e)
             }, status=500)
+
+@method_decorator(csrf_exempt, name='dispatch')
+class SessionRecommendationsView(View):
+    """Next artworks for the current browsing session, for logged-in and anonymous visitors"""
+    
+    def get(self, request):
+        try:
+            limit = int(request.GET.get('limit', 12))
+            session_id = request.GET.get('session_id')
+            
+            # Clients may send their recent views; otherwise use the session's views from the shared cache
+            artwork_ids = request.GET.get('artwork_ids')
+            if artwork_ids:
+                recent_views = [int(artwork_id) for artwork_id in artwork_ids.split(',') if artwork_id.strip()]
+            elif session_id:
+                recent_views = recommendation_engine.covisitation.recent_views(session_id)
+            else:
+                return JsonResponse({
+                    'success': False,
+                    'error': 'session_id or artwork_ids is required'
+                }, status=400)
+            
+            recommendations = recommendation_engine.get_session_recommendations(recent_views, limit)
+            
+            return JsonResponse({
+                'success': True,
+                'recommendations': recommendations,
+                'based_on': recent_views[-recommendation_engine.covisitation.session_length:],
+                'total_count': len(recommendations)
+            })
+            
+        except ValueError:
+            return JsonResponse({
+                'success': False,
+                'error': 'limit and artwork_ids must be integers'
+            }, status=400)
+        except Exception as e:
+            return JsonResponse({
+                'success': False,
+                'error': str(e)
+            }, status=500)
+
+@method_decorator(csrf_exempt, name='dispatch')
+class TrendingSearchesView(View):
+    """Trending search queries, globally or within a category, for suggestions"""
+    
+    def get(self, request):
+        try:
+            limit = int(request.GET.get('limit', 10))
+            category = request.GET.get('category') or None
+            
+            queries = recommendation_engine.trending_searches.top(
+                limit=limit,
+                category=category,
+                prefix=request.GET.get('prefix', '')
+            )
+            
+            return JsonResponse({
+                'success': True,
+                'category': category,
+                'queries': queries,
+                'total_count': len(queries)
+            })
+            
+        except Exception as e:
+            return JsonResponse({
+                'success': False,
+                'error': str(e)
+            }, status=500)
+
+@method_decorator(csrf_exempt, name='dispatch')
+class RecommendationMetricsView(View):
+    """Expose recommendation pipeline counters to staff"""
+    
+    def get(self, request):
+        if not request.user.is_staff:
+            return JsonResponse({
+                'success': False,
+                'error': 'Staff access required'
+            }, status=403)
+        
+        return JsonResponse({
+            'success': True,
+            'metrics': {
+                'event_buffer': behavior_buffer.stats(),
+                'recommendation_cache': recommendation_engine.recommendation_cache.stats(),
+                'artwork_hydration': recommendation_engine.artwork_hydrator.stats(),
+                'pipeline_stages': recommendation_engine.pipeline_metrics.stats(),
+                'global_feed': global_feed.stats(),
+                'algorithm_versions': recommendation_engine.versions.stats(),
+                'artwork_counters': artwork_counters.stats(),
+            }
+        })